@@ -1,6 +1,9 @@
 import os, time, socket, random, threading
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
+from bmo_project.panel_format import PanelConverter
+
+_rgb565 = PanelConverter((0xF800, 0x07E0, 0x001F, 0))
 
 # --- FONTS (Native 480x320 sizing) ---
 try:
@@ -218,9 +221,8 @@ def draw_heart(draw, pulse):
 
 
 def convert_to_rgb565(pil_img):
-    im_array = np.array(pil_img).astype(np.uint16)
-    r, g, b = (im_array[:,:,0] >> 3) << 11, (im_array[:,:,1] >> 2) << 5, (im_array[:,:,2] >> 3)
-    return (r | g | b).tobytes()
+    # Shared converter: preallocated buffers, in-place numpy math
+    return _rgb565.convert(np.asarray(pil_img)).tobytes()
 
 # --- MAIN LOOP ---
 def main():
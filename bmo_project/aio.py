@@ -0,0 +1,116 @@
+import asyncio
+import pygame
+from . import config
+from . import clock
+from . import display
+from . import inputs
+from . import latency
+from . import face_cache
+from . import network
+from . import render_cache
+from . import scheduler
+from . import tasks
+from . import watchdog
+
+# --- ASYNCIO RUNTIME (BMO_ASYNC=1) ---
+# Touch input, message sync and rendering are coroutines on one event loop.
+# Blocking HTTP calls (urllib) go to the worker pool (tasks.py), whose results
+# are picked up by run_frame().
+
+async def touch_input():
+    """Read the touch panel with evdev's async reader and queue its samples"""
+    try:
+        dev = inputs.open_touch_device()
+    except Exception as e:
+        print(f"Touch Error: {e}")
+        return
+    if dev is None:
+        print("🖱️ Running in Desktop Mode: Using Mouse for Touch Input")
+        return
+
+    print(f"👋 Async touch reader started on {dev.path}")
+    decoder = inputs.TouchDecoder(inputs.use_monotonic_timestamps(dev))
+    try:
+        async for event in dev.async_read_loop():
+            sample = decoder.feed(event)
+            if sample:
+                inputs.push_touches([sample])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Touch Error: {e}")
+    finally:
+        dev.close()
+
+async def message_sync(state):
+    """Periodic message fetch (every 60s)"""
+    while True:
+        tasks.submit("sync", network.sync_messages, state, unique=True)
+        await asyncio.sleep(60)
+
+async def render(state, screen, run_frame, wakeup):
+    """Frame loop: run a frame, then wait for the next deadline or a wakeup"""
+    while state["loop_running"]:
+        frame_start = clock.current()
+        deadline = run_frame(state, screen, pygame.event.get())
+        if not state["loop_running"]:
+            break
+
+        timeout, earliest = scheduler.frame_timeout(deadline, frame_start, state.get("power_save", False))
+        if config.IS_WINDOWS:
+            # SDL window events are only read by run_frame(): poll at the frame rate
+            timeout = 1.0 / config.MAX_FPS if timeout is None else min(timeout, 1.0 / config.MAX_FPS)
+        if timeout is not None and timeout <= 0:
+            await asyncio.sleep(0) # Let input and network coroutines run
+            continue
+        if clock.is_virtual():
+            clock.get_clock().advance_to(clock.current() + (timeout if timeout is not None else 1.0))
+            await asyncio.sleep(0)
+            continue
+
+        # Idle: block until the deadline (or forever) unless something wakes us
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            scheduler.count_wakeup(False)
+            continue
+        scheduler.count_wakeup(True)
+        wakeup.clear()
+        # Never exceed the frame rate cap, even when woken early
+        delay = earliest - clock.current()
+        if delay > 0 and not pygame.event.peek():
+            await asyncio.sleep(delay)
+
+async def _main(state, screen, run_frame):
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    scheduler.attach_async(loop, wakeup)
+
+    background = [
+        loop.create_task(touch_input(), name="touch"),
+        loop.create_task(message_sync(state), name="message-sync"),
+    ]
+    print("⚡ Async runtime started")
+    try:
+        await render(state, screen, run_frame, wakeup)
+    finally:
+        # Orderly shutdown: stop producers, drop queued jobs, detach the wakeup hook
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        tasks.stop()
+        scheduler.attach_async(None, None)
+
+def run(state, screen, run_frame):
+    """Run BMO on the asyncio runtime until QUIT / Ctrl+C. run_frame is main.run_frame."""
+    try:
+        asyncio.run(_main(state, screen, run_frame))
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        render_cache.report()
+        face_cache.report()
+        scheduler.report()
+        watchdog.report()
+        display.cleanup()
+        latency.report() # After cleanup: the last frame has been written
@@ -0,0 +1,58 @@
+import time
+
+class FrameClock:
+    """
+    Monotonic time source sampled once per frame.
+    Every update/draw of a frame sees the same now(), and NTP corrections of the
+    wall clock never make animations jump.
+    In virtual mode time only moves when the scheduler advances it, so a long
+    session runs as fast as the CPU allows and is reproducible.
+    """
+    def __init__(self, virtual=False, start=0.0):
+        self.virtual = virtual
+        self._virtual_now = start
+        self._now = self.current()
+        self.dt = 0.0
+
+    def current(self):
+        """Live reading (for threads and code outside the frame)"""
+        return self._virtual_now if self.virtual else time.monotonic()
+
+    def now(self):
+        """Time of the current frame"""
+        return self._now
+
+    def tick(self):
+        """Sample the clock for a new frame. Returns (now, dt)."""
+        now = self.current()
+        self.dt = now - self._now
+        self._now = now
+        return now, self.dt
+
+    def advance_to(self, t):
+        """Virtual mode: jump to `t` instead of sleeping"""
+        if t > self._virtual_now:
+            self._virtual_now = t
+
+# Shared clock, replaced with set_clock() (e.g. FrameClock(virtual=True) for simulations)
+_clock = FrameClock()
+
+def set_clock(frame_clock):
+    global _clock
+    _clock = frame_clock
+    return _clock
+
+def get_clock():
+    return _clock
+
+def now():
+    return _clock.now()
+
+def current():
+    return _clock.current()
+
+def tick():
+    return _clock.tick()
+
+def is_virtual():
+    return _clock.virtual
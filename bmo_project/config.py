@@ -27,6 +27,10 @@ BMO_FACES_ROOT = os.path.join(BASE_DIR, "bmo_faces")
 IDLE_THOUGHT_DIR = os.path.join(BASE_DIR, "idle_thought" if IS_WINDOWS else "bmo_assets/idle/thought")
 MESSAGES_FILE = os.path.join(BASE_DIR, "messages.json")
 FONT_FILE = os.path.join(BASE_DIR, "DejaVuSans-Bold.ttf")
+# Faces converted to the panel format (face_cache.py). Outside the checkout:
+# deploy.sh runs `git clean -fd` in BASE_DIR on the Pi.
+CACHE_DIR = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+FACE_CACHE_DIR = os.path.join(CACHE_DIR, "bmo", "faces")
 
 if IS_WINDOWS:
     FB_DEVICE = None
@@ -42,6 +46,48 @@ else:
     SURFACE_DEPTH = 16
     SURFACE_MASKS = (0xF800, 0x07E0, 0x001F, 0)
 
+# Display backend (Linux): "fb" writes the panel, "file:/path" or "shm[:name]" write
+# frames to a regular file / shared memory in the panel format, to run headless anywhere
+DISPLAY_BACKEND = os.environ.get("BMO_DISPLAY", "fb")
+FB_HEADLESS = False
+if not IS_WINDOWS and DISPLAY_BACKEND != "fb":
+    if DISPLAY_BACKEND.startswith("file:"):
+        FB_DEVICE = DISPLAY_BACKEND[len("file:"):]
+    elif DISPLAY_BACKEND.startswith("shm"):
+        FB_DEVICE = "/dev/shm/" + (DISPLAY_BACKEND.split(":", 1)[1] if ":" in DISPLAY_BACKEND else "bmo-fb")
+    else:
+        print(f"⚠️ Unknown BMO_DISPLAY '{DISPLAY_BACKEND}', using the framebuffer")
+    FB_HEADLESS = FB_DEVICE != "/dev/fb1"
+# Headless backends sleep for the time the SPI transfer would take (0 = as fast as possible)
+SPI_SPEED_HZ = int(os.environ.get("BMO_SPI_HZ", "32000000"))
+
+# Display pipeline
+MAX_FPS = 30
+POWER_SAVE_FPS = 10 # Frame rate cap when the ECO power mode is enabled
+# Longest sleep between two loop iterations, in seconds. None: every time-based
+# behavior has a deadline or wakes the loop, so an idle screen blocks until needed.
+MAX_IDLE_WAIT = None
+FRAME_BUDGET = 1.0 / MAX_FPS # Seconds per frame at the nominal rate
+ASYNC_PRESENT = os.environ.get("BMO_ASYNC_PRESENT", "1") == "1" # Write frames from a dedicated thread
+RENDER_CACHE_BYTES = 4 * 1024 * 1024 # Offscreen renderings of static screens (~13 full screens at 16bpp)
+# Decoded faces kept in memory (300 KB each at 16bpp): 8 MB suits a Pi Zero 2, a Pi 4 can keep them all
+FACE_MEMORY_BYTES = int(os.environ.get("BMO_FACE_MEMORY_MB", "8")) * 1024 * 1024
+WORKER_THREADS = 2 # Worker pool for blocking jobs (HTTP calls), see tasks.py
+DITHER_IMAGES = os.environ.get("BMO_DITHER", "0") == "1" # Ordered dithering when converting photos to 16-bit
+# The runtime is the only writer to the panel. For HDMI debugging, run the `mirror`
+# helper (bmo-mirror.service) and set BMO_MIRROR=1: damaged rows are sent to it.
+MIRROR_NOTIFY = os.environ.get("BMO_MIRROR", "0") == "1"
+MIRROR_SOCKET = "/run/bmo-damage.sock"
+
+# Runtime: BMO_ASYNC=1 runs input, message sync, network jobs and rendering as
+# coroutines on one asyncio loop instead of the polling loop + daemon threads
+ASYNC_RUNTIME = os.environ.get("BMO_ASYNC", "0") == "1"
+
+# Simulation: BMO_VIRTUAL_TIME=<seconds> runs the loop on a virtual clock for that long,
+# as fast as possible (no sleeping). BMO_SEED makes the random behaviors reproducible.
+VIRTUAL_TIME = float(os.environ.get("BMO_VIRTUAL_TIME", "0"))
+RANDOM_SEED = os.environ.get("BMO_SEED")
+
 # API Configuration
 SERVER_URL = "https://bmo.pg.maxencevacheron.fr" 
 MESSAGES_URL = f"{SERVER_URL}"
@@ -1,10 +1,247 @@
 import os
+import mmap
+import zlib
+import time
+import fcntl
+import socket
+import struct
+import threading
 import pygame
 from . import config
+from . import latency
+
+# Linux framebuffer ioctls (linux/fb.h)
+FBIOGET_VSCREENINFO = 0x4600
+FBIOGET_FSCREENINFO = 0x4602
+# fb_var_screeninfo: 8 geometry fields, red/green/blue/transp bitfields, 20 more u32
+_VSCREENINFO = struct.Struct("8I12I20I")
+# fb_fix_screeninfo up to line_length (native alignment for the unsigned longs)
+_FSCREENINFO = struct.Struct("@16sLIIII3HI")
+
+# Framebuffer output, opened once in init_display and reused every frame
+_fb_writer = None
+_presenter = None
+_mirror_sock = None # Damage notifications for the HDMI debug mirror (config.MIRROR_NOTIFY)
+
+# Damage tracking: draw functions report the regions they changed so only
+# those row spans are pushed to the panel. A frame with no report is flushed whole.
+_damage = {
+    "rects": [],        # Rects reported for the frame being drawn
+    "prev_rects": [],   # Rects of the previous frame (old overlay positions to erase)
+    "partial": False,   # Set once a draw function vouches for its rects
+    "full": True,       # Forced full flush (first frame, scene change...)
+    "scene": None
+}
+
+# Identical-frame detection: one CRC per band of TILE_ROWS rows of what the
+# panel currently shows. Hashing a memoryview slice costs far less than the SPI write.
+TILE_ROWS = 16
+_tile_hashes = []
+
+# Flush counters: frames and bytes actually written to the panel, frames skipped
+# as identical, frames replaced by a newer one before the presenter wrote them
+stats = {"frames": 0, "skipped_frames": 0, "dropped_frames": 0, "bytes_written": 0}
+
+def _count_written(spans, pitch):
+    stats["frames"] += 1
+    stats["bytes_written"] += sum(y1 - y0 for y0, y1 in spans) * pitch
+
+class FramebufferWriter:
+    """
+    Keeps the framebuffer device open (and mmapped when possible) between frames.
+    Falls back to pwrite at a fixed offset when the target cannot be mapped
+    (e.g. a regular file used for local testing).
+    """
+    def __init__(self, path, size, line_length=None, headless=False):
+        self.path = path
+        self.size = size
+        self.line_length = line_length # Device stride, None if same as the surface pitch
+        self.headless = headless # Regular file / shm target emulating the panel
+        self.fd = None
+        self.map = None
+
+    def open(self):
+        self.close()
+        if self.headless:
+            # Sized like the device so it can be mapped the same way
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.fstat(self.fd).st_size < self.size:
+                os.ftruncate(self.fd, self.size)
+        else:
+            self.fd = os.open(self.path, os.O_RDWR)
+        try:
+            self.map = mmap.mmap(self.fd, self.size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except (OSError, ValueError) as e:
+            print(f"Framebuffer mmap unavailable ({e}), using pwrite")
+            self.map = None
+        print(f"🖥️ Framebuffer opened: {self.path} ({'mmap' if self.map else 'pwrite'})")
+
+    def write_rows(self, data, pitch, spans):
+        """Write only the given (y0, y1) row spans of a full frame buffer"""
+        view = memoryview(data).cast('B')
+        stride = self.line_length or pitch
+        if self.headless and config.SPI_SPEED_HZ:
+            # Emulate the panel's transfer time so timings match the device
+            time.sleep(sum(y1 - y0 for y0, y1 in spans) * stride * 8 / config.SPI_SPEED_HZ)
+        for y0, y1 in spans:
+            if stride == pitch:
+                self.write(view[y0 * pitch:y1 * pitch], y0 * pitch)
+            else:
+                # Device rows are padded differently: copy row by row
+                row_bytes = min(pitch, stride)
+                for y in range(y0, y1):
+                    self.write(view[y * pitch:y * pitch + row_bytes], y * stride)
+
+    def write(self, data, offset=0):
+        """Write raw pixel bytes at offset. Reopens the device once on failure."""
+        for attempt in range(2):
+            if self.fd is None:
+                self.open()
+            try:
+                if self.map is not None:
+                    view = memoryview(data).cast('B')
+                    self.map[offset:offset + len(view)] = view
+                else:
+                    os.pwrite(self.fd, data, offset)
+                return
+            except (OSError, ValueError) as e:
+                print(f"Framebuffer write failed ({e}), reopening...")
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.map is not None:
+            try:
+                self.map.close()
+            except Exception:
+                pass
+            self.map = None
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+class Presenter:
+    """
+    Present stage: a writer thread pushes finished frames to the panel while
+    the main loop keeps rendering. Two frame buffers are used, one being written
+    by the thread and one being filled by the main loop. The queue depth is 1:
+    a frame that was not picked up before a newer one arrives is dropped and
+    its damage is merged into the newer one.
+    """
+    def __init__(self, writer, size):
+        self.writer = writer
+        self.buffers = [bytearray(size), bytearray(size)]
+        self.back = 0 # Buffer the main loop may fill
+        self.pending = None # (buffer index, pitch, spans, submit time, touches shown)
+        self.panel_lost = False # A write failed: the main loop must resend everything
+        self.running = True
+        self.cond = threading.Condition()
+        self.stats = {"presented": 0, "dropped": 0, "late": 0, "last_write_ms": 0.0}
+        self.thread = threading.Thread(target=self._run, name="fb-present", daemon=True)
+        self.thread.start()
+
+    def submit(self, buf, pitch, spans, touches=()):
+        """Copy the frame into the back buffer and hand it to the writer thread"""
+        view = memoryview(buf).cast('B')
+        with self.cond:
+            if self.pending is not None:
+                # Previous frame never reached the panel: replace it
+                self.stats["dropped"] += 1
+                stats["dropped_frames"] += 1
+                idx, _, old_spans, _, old_touches = self.pending
+                spans = _merge_spans(old_spans + spans)
+                touches = old_touches + list(touches)
+            else:
+                idx = self.back
+            self.buffers[idx][:len(view)] = view
+            self.pending = (idx, pitch, spans, time.monotonic(), list(touches))
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.pending is None and self.running:
+                    self.cond.wait()
+                if self.pending is None:
+                    return # Stopped and drained
+                idx, pitch, spans, submitted, touches = self.pending
+                self.pending = None
+                self.back = 1 - idx
+
+            start = time.monotonic()
+            try:
+                self.writer.write_rows(self.buffers[idx], pitch, spans)
+            except Exception as e:
+                print(f"Framebuffer present error: {e}")
+                with self.cond:
+                    self.panel_lost = True # Damage state belongs to the main thread
+                continue
+            done = time.monotonic()
+
+            _count_written(spans, pitch)
+            _notify_mirror(spans)
+            latency.presented(touches, done)
+            self.stats["presented"] += 1
+            self.stats["last_write_ms"] = (done - start) * 1000
+            if done - submitted > config.FRAME_BUDGET:
+                self.stats["late"] += 1
+
+    def take_panel_lost(self):
+        """Main thread: True once after a failed write"""
+        with self.cond:
+            lost, self.panel_lost = self.panel_lost, False
+        return lost
+
+    def stop(self):
+        """Write any pending frame, then stop the thread"""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join(timeout=2.0)
+
+def query_fb_format(fb_path):
+    """
+    Ask the framebuffer driver for its geometry and pixel layout.
+    Returns None when fb_path is not a framebuffer (e.g. a plain file in tests).
+    """
+    try:
+        fd = os.open(fb_path, os.O_RDONLY)
+    except OSError as e:
+        print(f"Framebuffer format query failed: {e}")
+        return None
+    try:
+        var = _VSCREENINFO.unpack(fcntl.ioctl(fd, FBIOGET_VSCREENINFO, bytes(_VSCREENINFO.size)))
+        fix = _FSCREENINFO.unpack(fcntl.ioctl(fd, FBIOGET_FSCREENINFO, bytes(_FSCREENINFO.size)))
+    except OSError as e:
+        print(f"Framebuffer format query failed on {fb_path}: {e}")
+        return None
+    finally:
+        os.close(fd)
+
+    xres, yres, _, _, _, _, bpp, _ = var[:8]
+    red, green, blue = var[8:11], var[11:14], var[14:17]
+    masks = tuple(((1 << length) - 1) << offset for offset, length, _ in (red, green, blue)) + (0,)
+    return {
+        "size": (xres, yres),
+        "depth": bpp,
+        "masks": masks,
+        "line_length": fix[-1]
+    }
+
+def native_surface(size):
+    """Create a surface in the panel's native pixel format, so flushing never converts pixels"""
+    if config.IS_WINDOWS:
+        return pygame.Surface(size)
+    return pygame.Surface(size, depth=config.SURFACE_DEPTH, masks=config.SURFACE_MASKS)
 
 def init_display():
     """Initialize Pygame and the display surface"""
-    
+    global _fb_writer, _presenter, _mirror_sock
+
     if config.IS_WINDOWS:
         # Windowed mode for local dev with scaling
         pygame.init()
@@ -13,39 +250,196 @@ def init_display():
         window_height = config.HEIGHT * config.SCALE_FACTOR
         window = pygame.display.set_mode((window_width, window_height))
         pygame.display.set_caption(f"{config.IDENTITY} - BMO Project (Scaled {config.SCALE_FACTOR}x)")
-        
+
         # We still return a "virtual" screen at the original resolution (480x320)
         # We will scale this surface to the window in update_framebuffer
         screen = pygame.Surface((config.WIDTH, config.HEIGHT))
-        
+
     else:
         # Headless/Framebuffer mode for Raspberry Pi
         os.environ["SDL_VIDEODRIVER"] = "dummy"
         pygame.init()
-        # Create Surface matching Framebuffer format (RGB565)
-        # 16-bit depth with specific masks for 5-6-5 format
-        screen = pygame.Surface((config.WIDTH, config.HEIGHT), depth=config.SURFACE_DEPTH, masks=config.SURFACE_MASKS)
-    
+
+        # Negotiate the pixel format with the driver; config (RGB565) is the fallback
+        fb_format = query_fb_format(config.FB_DEVICE) if config.FB_DEVICE and not config.FB_HEADLESS else None
+        line_length = None
+        if fb_format and fb_format["depth"] in (16, 24, 32) and fb_format["size"][0] >= config.WIDTH and fb_format["size"][1] >= config.HEIGHT:
+            config.SURFACE_DEPTH = fb_format["depth"]
+            config.SURFACE_MASKS = fb_format["masks"]
+            line_length = fb_format["line_length"]
+            print(f"🖥️ Framebuffer format: {fb_format['size'][0]}x{fb_format['size'][1]} {fb_format['depth']}bpp masks={tuple(hex(m) for m in fb_format['masks'][:3])}")
+        elif fb_format:
+            print(f"⚠️ Unsupported framebuffer format {fb_format}, using RGB565 defaults")
+
+        # Create Surface matching the Framebuffer format, every asset surface uses the same one
+        screen = native_surface((config.WIDTH, config.HEIGHT))
+
+        # Open the framebuffer once; update_framebuffer reuses it every frame
+        if config.FB_DEVICE:
+            stride = line_length or screen.get_pitch()
+            _fb_writer = FramebufferWriter(config.FB_DEVICE, stride * screen.get_height(), line_length, config.FB_HEADLESS)
+            if config.FB_HEADLESS:
+                print(f"🧪 Headless display backend: {config.FB_DEVICE} ({screen.get_width()}x{screen.get_height()} {config.SURFACE_DEPTH}bpp)")
+            try:
+                _fb_writer.open()
+            except OSError as e:
+                # Retried lazily on the first frame
+                print(f"Framebuffer open error: {e}")
+            if config.ASYNC_PRESENT:
+                _presenter = Presenter(_fb_writer, _fb_writer.size)
+
+        if config.MIRROR_NOTIFY:
+            _mirror_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            _mirror_sock.setblocking(False)
+            print(f"🪞 Sending damage notifications to {config.MIRROR_SOCKET}")
+
     # Initialize fonts
     config.init_fonts()
-    
+
     return screen
 
+# --- DAMAGE TRACKING ---
+def set_scene(key):
+    """Declare what is on screen (mode, overlays...). Any change forces a full flush."""
+    if key != _damage["scene"]:
+        _damage["scene"] = key
+        _damage["full"] = True
+
+def mark_full():
+    """Force the next flush to push the whole frame"""
+    _damage["full"] = True
+
+def mark_dirty(*rects):
+    """
+    Report the regions changed by the current draw. Calling this (even with no
+    rects) declares that the rest of the frame is identical to the last one.
+    """
+    _damage["partial"] = True
+    for r in rects:
+        _damage["rects"].append(pygame.Rect(r))
+
+def mark_overlay(*rects):
+    """Report regions drawn on top of the mode (feedback, badges) without vouching for the rest"""
+    for r in rects:
+        _damage["rects"].append(pygame.Rect(r))
+
+def _merge_spans(spans):
+    """Sort (y0, y1) row spans and merge the overlapping ones"""
+    merged = []
+    for y0, y1 in sorted(spans):
+        if y1 <= y0:
+            continue
+        if merged and y0 <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], y1))
+        else:
+            merged.append((y0, y1))
+    return merged
+
+def _take_damage(height):
+    """Return merged (y0, y1) row spans to flush, or None for a full frame"""
+    rects = _damage["rects"]
+    spans = None
+    if _damage["partial"] and not _damage["full"]:
+        spans = _merge_spans([(max(0, r.top), min(height, r.bottom)) for r in rects + _damage["prev_rects"]])
+
+    _damage["prev_rects"] = rects
+    _damage["rects"] = []
+    _damage["partial"] = False
+    _damage["full"] = False
+    return spans
+
+def _changed_spans(buf, pitch, height, spans):
+    """Narrow spans down to the tiles whose content differs from the panel"""
+    global _tile_hashes
+    tiles = (height + TILE_ROWS - 1) // TILE_ROWS
+    if len(_tile_hashes) != tiles:
+        _tile_hashes = [None] * tiles
+
+    view = memoryview(buf).cast('B')
+    changed = []
+    for y0, y1 in spans:
+        for t in range(y0 // TILE_ROWS, (y1 - 1) // TILE_ROWS + 1):
+            ty0, ty1 = t * TILE_ROWS, min(height, (t + 1) * TILE_ROWS)
+            h = zlib.crc32(view[ty0 * pitch:ty1 * pitch])
+            if h == _tile_hashes[t]:
+                continue
+            _tile_hashes[t] = h
+            if changed and changed[-1][1] >= ty0:
+                changed[-1] = (changed[-1][0], ty1)
+            else:
+                changed.append((ty0, ty1))
+    return changed
+
+def _forget_panel():
+    """Panel content is unknown (write error): resend everything next time. Main thread only."""
+    global _tile_hashes
+    _tile_hashes = []
+    mark_full()
+
+def _notify_mirror(spans):
+    """Tell the debug mirror which rows changed: packed little-endian (y0, y1) uint16 pairs"""
+    if _mirror_sock is None:
+        return
+    try:
+        _mirror_sock.sendto(struct.pack(f"<{2 * len(spans)}H", *[y for span in spans for y in span]), config.MIRROR_SOCKET)
+    except OSError:
+        pass # Mirror not running
+
+def _get_writer(screen, fb_path):
+    global _fb_writer
+    if _fb_writer is None or _fb_writer.path != fb_path:
+        if _fb_writer:
+            _fb_writer.close()
+        _forget_panel()
+        _fb_writer = FramebufferWriter(fb_path, screen.get_pitch() * screen.get_height(), headless=not fb_path.startswith("/dev/fb"))
+    return _fb_writer
+
 def update_framebuffer(screen, fb_path=config.FB_DEVICE):
     """Write the current screen content to the framebuffer device or window"""
+    if _presenter and _presenter.take_panel_lost():
+        _forget_panel()
+    spans = _take_damage(screen.get_height())
     try:
         if config.IS_WINDOWS:
             # Scale the internal screen to the window size
             window = pygame.display.get_surface()
             pygame.transform.scale(screen, window.get_size(), window)
             pygame.display.flip()
+            shown = time.monotonic()
+            latency.presented(latency.take(shown), shown)
         elif fb_path:
-            with open(fb_path, "wb") as fb:
-                fb.write(screen.get_buffer())
+            writer = _get_writer(screen, fb_path)
+            pitch, height = screen.get_pitch(), screen.get_height()
+            buf = screen.get_buffer()
+            spans = _changed_spans(buf, pitch, height, [(0, height)] if spans is None else spans)
+            if not spans:
+                stats["skipped_frames"] += 1
+                latency.take(time.monotonic()) # Touches answered by this frame changed nothing
+                return
+            touches = latency.take(time.monotonic())
+            if _presenter and _presenter.writer is writer:
+                _presenter.submit(buf, pitch, spans, touches)
+            else:
+                writer.write_rows(buf, pitch, spans)
+                _count_written(spans, pitch)
+                latency.presented(touches, time.monotonic())
+                _notify_mirror(spans)
     except IOError as e:
         print(f"Framebuffer Write Error: {e}")
+        _forget_panel()
     except Exception as e:
         print(f"Framebuffer error: {e}")
+        _forget_panel()
 
 def cleanup():
+    global _fb_writer, _presenter, _mirror_sock
+    if _presenter:
+        _presenter.stop()
+        _presenter = None
+    if _mirror_sock:
+        _mirror_sock.close()
+        _mirror_sock = None
+    if _fb_writer:
+        _fb_writer.close()
+        _fb_writer = None
     pygame.quit()
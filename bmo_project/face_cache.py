@@ -0,0 +1,172 @@
+import os
+import mmap
+import hashlib
+import threading
+from PIL import Image
+from . import config
+from . import display
+from . import pixels
+from . import watchdog
+from .render_cache import LRUCache, surface_bytes
+
+# --- FACE CACHE ---
+# A face is a JPEG that needs a decode, a resize to the screen size and a
+# conversion to the panel format: hundreds of ms on the Pi. Each face is
+# converted once into a raw frame in FACE_CACHE_DIR, named after its source
+# path, mtime, size and the surface format. Loading a face is then an mmap and
+# one copy into a surface. Recently used faces also stay decoded in memory
+# (`surfaces`, FACE_MEMORY_BYTES), so a rotation over a few faces reads nothing.
+
+EXTENSIONS = ('.jpg', '.jpeg', '.png')
+SCREEN_SIZE = (config.WIDTH, config.HEIGHT)
+
+stats = {"hits": 0, "misses": 0} # Cache files read / faces converted
+# Decoded faces by cache file name (the key covers the source mtime and format).
+# Faces are only ever blitted, so one surface can be shared.
+surfaces = LRUCache(config.FACE_MEMORY_BYTES, surface_bytes)
+_surfaces_lock = threading.Lock() # Faces are loaded by workers too (also guards stats)
+_listings = {} # directory -> (mtime, face files)
+_formats = {} # size -> format part of the cache key
+_build_lock = threading.Lock()
+
+def list_faces(directory):
+    """Face files of a directory. The listing is only read again when the directory changes."""
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return []
+    cached = _listings.get(directory)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    files = sorted(f for f in os.listdir(directory) if f.lower().endswith(EXTENSIONS))
+    _listings[directory] = (mtime, files)
+    return files
+
+def _format_key(size):
+    """Everything about the surface format that changes the cached bytes"""
+    key = _formats.get(size)
+    if key is None:
+        probe = display.native_surface((size[0], 1))
+        masks = "-".join("%x" % m for m in probe.get_masks())
+        key = f"{size[0]}x{size[1]}-{probe.get_bitsize()}bpp-{probe.get_pitch()}-{masks}-dither{int(config.DITHER_IMAGES)}"
+        _formats[size] = key
+    return key
+
+def cache_path(path, size=SCREEN_SIZE):
+    """Cache file of a face (raises OSError if the face doesn't exist)"""
+    st = os.stat(path)
+    key = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{_format_key(size)}"
+    return os.path.join(config.FACE_CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".raw")
+
+def _read(cache_file, size):
+    surface = display.native_surface(size)
+    with open(cache_file, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(surface.get_buffer())
+            try:
+                if len(mm) != view.nbytes:
+                    raise ValueError(f"{cache_file}: {len(mm)} bytes, expected {view.nbytes}")
+                view[:] = mm
+            finally:
+                view.release()
+    return surface
+
+def _write(cache_file, surface):
+    os.makedirs(config.FACE_CACHE_DIR, exist_ok=True)
+    tmp = f"{cache_file}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(surface.get_buffer().raw)
+    os.replace(tmp, cache_file) # Readers never see a partial file
+
+def _convert(path, size):
+    img = Image.open(path).convert('RGB')
+    img = img.resize(size, Image.Resampling.BILINEAR)
+    return pixels.image_to_surface(img)
+
+@watchdog.timed
+def load(path, size=SCREEN_SIZE):
+    """A face as a panel-format surface (None if the file doesn't exist)"""
+    try:
+        cache_file = cache_path(path, size)
+    except OSError:
+        return None
+    with _surfaces_lock:
+        surface = surfaces.get(cache_file)
+    if surface is not None:
+        return surface
+
+    try:
+        surface = _read(cache_file, size)
+        counter = "hits"
+    except (OSError, ValueError):
+        # Not converted yet (or unreadable): convert it again
+        counter = "misses"
+        surface = _convert(path, size)
+        try:
+            _write(cache_file, surface)
+        except OSError as e:
+            print(f"⚠️ Face cache write failed: {e}")
+    with _surfaces_lock:
+        stats[counter] += 1
+        surfaces.put(cache_file, surface)
+    return surface
+
+def build(root=None):
+    """
+    Convert every face under `root` (BMO_FACES_ROOT) that is not cached yet and
+    delete the cache files no face uses anymore. Runs on its own thread (start_build).
+    """
+    root = root or config.BMO_FACES_ROOT
+    with _build_lock:
+        converted, keep = 0, set()
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                if not name.lower().endswith(EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    cache_file = cache_path(path)
+                    keep.add(os.path.basename(cache_file))
+                    if not os.path.exists(cache_file):
+                        _write(cache_file, _convert(path, SCREEN_SIZE))
+                        converted += 1
+                except Exception as e:
+                    print(f"⚠️ Face cache: {path}: {e}")
+
+        removed = 0
+        if root == config.BMO_FACES_ROOT and os.path.isdir(config.FACE_CACHE_DIR):
+            for name in os.listdir(config.FACE_CACHE_DIR):
+                if name.endswith(".raw") and name not in keep:
+                    try:
+                        os.remove(os.path.join(config.FACE_CACHE_DIR, name))
+                        removed += 1
+                    except OSError:
+                        pass
+        print(f"🗂️ Face cache: {len(keep)} faces, {converted} converted, {removed} stale removed")
+        return converted
+
+def start_build():
+    """
+    Run build() on a low-priority thread of its own: converting every face takes
+    a while, and the worker pool must stay free for sync, weather and prefetch.
+    """
+    def run():
+        try:
+            # Linux: niceness is per thread (native id)
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        try:
+            build()
+        except Exception as e:
+            print(f"⚠️ Face cache build failed: {e}")
+    threading.Thread(target=run, name="bmo-face-cache", daemon=True).start()
+
+def report():
+    """Log the in-memory face cache counters"""
+    with _surfaces_lock:
+        st = surfaces.stats()
+        hits, misses = stats["hits"], stats["misses"]
+    print(f"🙂 Face surfaces: {st['hits']} hits / {st['misses']} misses ({st['hit_rate']:.0%}), "
+          f"{st['entries']} in memory, {st['bytes'] // 1024} KB of {surfaces.max_bytes // 1024} KB, "
+          f"{st['evictions']} evictions; {hits} read from disk, {misses} converted")
@@ -1,7 +1,8 @@
 import pygame
 import random
-import time
 from .. import config
+from .. import clock
+from ..modes import Mode, register
 
 class SnakeGame:
     def __init__(self, width, height):
@@ -16,7 +17,7 @@ class SnakeGame:
         self.food = self._spawn_food()
         self.score = 0
         self.game_over = False
-        self.last_move = time.time()
+        self.last_move = clock.now()
         self.move_delay = 0.2  # Speed
         
     def _spawn_food(self):
@@ -59,8 +60,8 @@ class SnakeGame:
         if self.game_over:
             return
             
-        if time.time() - self.last_move > self.move_delay:
-            self.last_move = time.time()
+        if clock.now() - self.last_move > self.move_delay:
+            self.last_move = clock.now()
             
             # New head
             head_x, head_y = self.snake[0]
@@ -88,6 +89,12 @@ class SnakeGame:
             else:
                 self.snake.pop()
 
+    def next_deadline(self):
+        """Time of the next move (None once the game is over)"""
+        if self.game_over:
+            return None
+        return self.last_move + self.move_delay
+
     def draw(self, screen):
         # Background
         screen.fill(config.GREEN) 
@@ -131,3 +138,32 @@ class SnakeGame:
             hint = config.FONT_MEDIUM.render("Tap to Exit", True, config.WHITE)
             screen.blit(msg, (self.width//2 - msg.get_width()//2, self.height//2 - 20))
             screen.blit(hint, (self.width//2 - hint.get_width()//2, self.height//2 + 30))
+
+
+class SnakeMode(Mode):
+    name = "SNAKE"
+
+    def enter(self, state):
+        state["snake"] = SnakeGame(config.WIDTH, config.HEIGHT)
+
+    def exit(self, state):
+        state["snake"] = None
+
+    def update(self, state, dt):
+        if state.get("snake"):
+            state["snake"].update()
+            state["needs_redraw"] = True
+
+    def draw(self, screen, state):
+        if state.get("snake"):
+            state["snake"].draw(screen)
+
+    def handle_touch(self, state, pos):
+        if state.get("snake"):
+            if state["snake"].handle_input(pos) == "EXIT":
+                state["current_mode"] = "MENU"
+
+    def next_deadline(self, state, now):
+        return state["snake"].next_deadline() if state.get("snake") else None
+
+register(SnakeMode())
@@ -0,0 +1,133 @@
+import math
+from collections import deque
+import pygame
+
+# --- GESTURES ---
+# Raw contact samples ("down" / "move" / "up", from the touch reader or the
+# mouse) become tap, long_press, swipe and drag gestures. Pure logic driven by
+# the sample times: the main loop feeds it, and polls it for long presses.
+# Drags scroll the message view; the paged lists (menu, inbox) turn pages on
+# swipes.
+
+GESTURE_EVENT = pygame.USEREVENT + 2 # scheduler.WAKE_EVENT is USEREVENT + 1
+
+TAP_SLOP = 12             # px a finger can move and still tap / long-press
+LONG_PRESS = 0.6          # s held without moving
+SWIPE_MIN_DISTANCE = 50   # px along the main axis
+SWIPE_MIN_VELOCITY = 300  # px/s at release
+VELOCITY_WINDOW = 0.1     # s of samples used for the velocity
+
+class GestureRecognizer:
+    """
+    One contact at a time (the panel is single touch). Gestures are dicts:
+        gesture   "tap", "long_press", "swipe" or "drag"
+        contact   id of the touch, shared by all gestures of one touch
+        time      time of the sample that completed the gesture
+        pos       current position, start: where the touch began
+        dx, dy    offset from start, vx, vy: velocity (px/s)
+        phase     drag only: "start", "move" or "end"
+        direction swipe only: "left", "right", "up" or "down"
+    A touch gives a tap, a long_press or a drag (start, moves, end) followed
+    by a swipe if released fast enough.
+    """
+    def __init__(self):
+        self.contact = None
+        self._ids = 0
+
+    def down(self, pos, t):
+        self._ids += 1
+        self.contact = {
+            "id": self._ids,
+            "start": pos,
+            "start_time": t,
+            "pos": pos,
+            "samples": deque([(t, pos)]),
+            "dragging": False,
+            "long_pressed": False
+        }
+        return []
+
+    def move(self, pos, t):
+        c = self.contact
+        if c is None or c["long_pressed"]:
+            return []
+        self._sample(c, pos, t)
+        if c["dragging"]:
+            return [self._gesture("drag", c, phase="move")]
+        if math.dist(c["start"], pos) > TAP_SLOP:
+            c["dragging"] = True
+            return [self._gesture("drag", c, phase="start")]
+        return []
+
+    def up(self, pos, t):
+        c, self.contact = self.contact, None
+        if c is None or c["long_pressed"]:
+            return []
+        self._sample(c, pos, t)
+        if not c["dragging"]:
+            return [self._gesture("tap", c)]
+
+        gestures = [self._gesture("drag", c, phase="end")]
+        swipe = self._gesture("swipe", c)
+        if abs(swipe["dx"]) >= abs(swipe["dy"]):
+            distance, speed = swipe["dx"], swipe["vx"]
+            direction = "right" if distance > 0 else "left"
+        else:
+            distance, speed = swipe["dy"], swipe["vy"]
+            direction = "down" if distance > 0 else "up"
+        # Fast enough, and still moving the same way when released
+        if abs(distance) >= SWIPE_MIN_DISTANCE and abs(speed) >= SWIPE_MIN_VELOCITY and distance * speed > 0:
+            swipe["direction"] = direction
+            gestures.append(swipe)
+        return gestures
+
+    def poll(self, t):
+        """Gestures due by time alone (long press)"""
+        deadline = self.deadline()
+        if deadline is None or t < deadline:
+            return []
+        self.contact["long_pressed"] = True
+        return [self._gesture("long_press", self.contact, time=deadline)]
+
+    def deadline(self):
+        """When poll() will have a long press to report (None = no touch pending)"""
+        c = self.contact
+        if c is None or c["dragging"] or c["long_pressed"]:
+            return None
+        return c["start_time"] + LONG_PRESS
+
+    def _sample(self, c, pos, t):
+        c["pos"] = pos
+        samples = c["samples"]
+        samples.append((t, pos))
+        while len(samples) > 2 and t - samples[0][0] > VELOCITY_WINDOW:
+            samples.popleft()
+
+    def _gesture(self, name, c, **extra):
+        (t0, (x0, y0)), (t1, (x1, y1)) = c["samples"][0], c["samples"][-1]
+        elapsed = t1 - t0
+        gesture = {
+            "gesture": name,
+            "contact": c["id"],
+            "time": t1,
+            "pos": c["pos"],
+            "start": c["start"],
+            "dx": c["pos"][0] - c["start"][0],
+            "dy": c["pos"][1] - c["start"][1],
+            "vx": (x1 - x0) / elapsed if elapsed > 0 else 0.0,
+            "vy": (y1 - y0) / elapsed if elapsed > 0 else 0.0
+        }
+        gesture.update(extra)
+        return gesture
+
+def coalesce(gestures):
+    """Keep only the last of consecutive drag moves (one per frame is enough)"""
+    out = []
+    for g in gestures:
+        if (out and g["gesture"] == "drag" and g["phase"] == "move"
+                and out[-1]["gesture"] == "drag" and out[-1]["phase"] == "move"
+                and out[-1]["contact"] == g["contact"]):
+            out[-1] = g
+        else:
+            out.append(g)
+    return out
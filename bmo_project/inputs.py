@@ -1,5 +1,10 @@
+import os
+import fcntl
+import select
+import struct
 import threading
 import time
+from collections import deque
 import pygame
 from . import config
 # Only import evdev on Linux if possible, or handle import error
@@ -10,56 +15,272 @@ except ImportError:
     HAS_EVDEV = False
 
 from . import utils
+from . import scheduler
+from . import gestures
 
-def touch_thread(running_event):
+def _to_screen(raw_x, raw_y):
+    """Panel coordinates (0-4095) to screen pixels"""
+    # Calibration (from bmo_pygame.py)
+    sx = config.WIDTH - ((raw_y / 4095.0) * config.WIDTH)
+    sy = (raw_x / 4095.0) * config.HEIGHT
+
+    # Clamp
+    sx = max(0, min(config.WIDTH, sx))
+    sy = max(0, min(config.HEIGHT, sy))
+    return (int(sx), int(sy))
+
+# EVIOCSCLOCKID = _IOW('E', 0xa0, int) (linux/input.h)
+EVIOCSCLOCKID = 0x400445a0
+
+def use_monotonic_timestamps(dev):
     """
-    Background thread to read touch events and post them to Pygame event queue.
-    running_event: threading.Event to signal when to stop.
+    Ask the kernel to stamp the device's events with CLOCK_MONOTONIC, the clock
+    of time.monotonic(). Returns the offset to subtract from event timestamps
+    (wall clock stamps if the ioctl is refused).
     """
-    if config.IS_WINDOWS or not HAS_EVDEV:
-        # On Windows, Pygame handles mouse events as touch events in the main loop
-        # We don't need a separate thread for input
-        print("🖱️ Running in Desktop Mode: Using Mouse for Touch Input")
-        while running_event.is_set():
-            time.sleep(1)
-        return
-
-    touch_path = utils.find_touch_device()
     try:
-        dev = InputDevice(touch_path)
-        print(f"👋 Touch thread started on {touch_path}")
+        fcntl.ioctl(dev.fd, EVIOCSCLOCKID, struct.pack("i", time.CLOCK_MONOTONIC))
+        return 0.0
+    except (OSError, AttributeError):
+        return time.time() - time.monotonic()
+
+class TouchDecoder:
+    """Turns raw evdev events into contact samples (screen coordinates)"""
+    def __init__(self, timestamp_offset=0.0):
+        self.timestamp_offset = timestamp_offset # See use_monotonic_timestamps()
+        self.raw_x, self.raw_y = 0, 0
+        self.last_finger_state = False
+        self.finger_down = False
+        self.last_pos = None
+
+    def feed(self, event):
+        """
+        Returns ("down" | "move" | "up", (x, y), time) when a SYN_REPORT completes
+        a change of the contact, else None. time is the kernel timestamp of the
+        report (time.monotonic clock).
+        """
+        if event.type == ecodes.EV_ABS:
+            if event.code == ecodes.ABS_X: self.raw_x = event.value
+            if event.code == ecodes.ABS_Y: self.raw_y = event.value
         
-        raw_x, raw_y = 0, 0
-        last_finger_state = False
-        finger_down = False
+        elif event.type == ecodes.EV_KEY and event.code == ecodes.BTN_TOUCH:
+            self.finger_down = (event.value == 1)
         
-        for event in dev.read_loop():
-            if not running_event.is_set():
-                break
-                
-            if event.type == ecodes.EV_ABS:
-                if event.code == ecodes.ABS_X: raw_x = event.value
-                if event.code == ecodes.ABS_Y: raw_y = event.value
-            
-            elif event.type == ecodes.EV_KEY and event.code == ecodes.BTN_TOUCH:
-                finger_down = (event.value == 1)
+        elif event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT:
+            sample = None
+            pos = _to_screen(self.raw_x, self.raw_y)
+            t = event.timestamp() - self.timestamp_offset
+            if self.finger_down and not self.last_finger_state:
+                sample = ("down", pos, t)
+            elif self.finger_down and pos != self.last_pos:
+                sample = ("move", pos, t)
+            elif not self.finger_down and self.last_finger_state:
+                sample = ("up", self.last_pos, t)
             
-            elif event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT:
-                if finger_down and not last_finger_state:
-                    # New Touch Detected!
-                    # Calibration (from bmo_pygame.py)
-                    
-                    sx = config.WIDTH - ((raw_y / 4095.0) * config.WIDTH)
-                    sy = (raw_x / 4095.0) * config.HEIGHT
-                    
-                    # Clamp
-                    sx = max(0, min(config.WIDTH, sx))
-                    sy = max(0, min(config.HEIGHT, sy))
-                    
-                    # Post to Pygame
-                    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, {'pos': (int(sx), int(sy)), 'button': 1}))
-                
-                last_finger_state = finger_down
-                
-    except Exception as e:
-        print(f"Touch Error: {e}")
+            self.last_finger_state = self.finger_down
+            if self.finger_down:
+                self.last_pos = pos
+            return sample
+        return None
+
+# --- TOUCH QUEUE ---
+# Single producer (the touch reader), single consumer (the main loop).
+# deque.append / popleft are atomic, no lock needed. Touches don't go through
+# pygame.event.post: the SDL event queue is not safe to feed from another thread.
+_touches = deque()
+
+def push_touches(samples):
+    """Producer side: queue contact samples and ring the main loop once for the whole batch"""
+    if not samples:
+        return
+    _touches.extend(samples)
+    scheduler.wake()
+
+def drain_touches():
+    """Consumer side (main loop): the queued contact samples"""
+    samples = []
+    while True:
+        try:
+            samples.append(_touches.popleft())
+        except IndexError:
+            return samples
+
+# --- GESTURES ---
+_recognizer = gestures.GestureRecognizer()
+
+def collect(events, now):
+    """
+    Main loop: the frame's events. Left mouse button events (desktop) and the
+    queued touches go through the gesture recognizer. Each touch gives a
+    MOUSEBUTTONDOWN as it starts (with its `contact` id), then GESTURE_EVENTs.
+    Both have the `time` of the sample behind them (kernel timestamp for the
+    touch panel, frame time for the mouse). Other mouse buttons (right click,
+    wheel) mean nothing on a touch screen and are dropped.
+    """
+    out = []
+    samples = []
+    for event in events:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            samples.append(("down", event.pos, now))
+        elif event.type == pygame.MOUSEMOTION and event.buttons[0]:
+            samples.append(("move", event.pos, now))
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            samples.append(("up", event.pos, now))
+        elif event.type not in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            out.append(event)
+    samples += drain_touches()
+
+    found = []
+    for kind, pos, t in samples:
+        if kind == "down":
+            found += _recognizer.down(pos, t)
+            out.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN,
+                                          {'pos': pos, 'button': 1, 'contact': _recognizer.contact["id"], 'time': t}))
+        elif kind == "move":
+            found += _recognizer.move(pos, t)
+        else:
+            found += _recognizer.up(pos, t)
+    found += _recognizer.poll(now)
+
+    for g in gestures.coalesce(found):
+        out.append(pygame.event.Event(gestures.GESTURE_EVENT, g))
+    return out
+
+def next_deadline():
+    """Time of the pending long press, if a finger is down"""
+    return _recognizer.deadline()
+
+def open_touch_device():
+    """InputDevice for the touch panel, or None on desktop / without evdev"""
+    if config.IS_WINDOWS or not HAS_EVDEV:
+        return None
+    touch_path = utils.find_touch_device()
+    return InputDevice(touch_path)
+
+class TouchReader:
+    """
+    Touch panel reader thread. Waits on the evdev fd and a wakeup pipe with
+    epoll (select where epoll is missing), so stop() returns right away instead
+    of after the next touch. Events are decoded one SYN_REPORT packet at a time
+    and contact samples are handed to the main loop through push_touches().
+    The device is reopened when it goes away (USB / SPI hiccup).
+    """
+    REOPEN_DELAYS = (0.5, 1.0, 2.0, 5.0) # Backoff between reopen attempts
+
+    def __init__(self):
+        self._running = False
+        self._thread = None
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+
+    def start(self):
+        if config.IS_WINDOWS or not HAS_EVDEV:
+            # On Windows, Pygame handles mouse events as touch events in the main loop
+            print("🖱️ Running in Desktop Mode: Using Mouse for Touch Input")
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="bmo-touch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the reader thread and wait for it"""
+        self._running = False
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass # Pipe full: a wakeup is already pending
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return # Stuck in open(): leave the pipe to it, it's a daemon thread
+            self._thread = None
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _sleep(self, seconds):
+        """Wait `seconds` unless stop() is called meanwhile"""
+        select.select([self._wake_r], [], [], seconds)
+
+    def _run(self):
+        failures = 0
+        while self._running:
+            try:
+                dev = open_touch_device()
+            except Exception as e:
+                delay = self.REOPEN_DELAYS[min(failures, len(self.REOPEN_DELAYS) - 1)]
+                print(f"Touch Error: {e} (retrying in {delay}s)")
+                failures += 1
+                self._sleep(delay)
+                continue
+
+            print(f"👋 Touch reader started on {dev.path}")
+            failures = 0
+            try:
+                self._read(dev)
+            except Exception as e:
+                print(f"Touch Error: {e}, reopening {dev.path}")
+                self._sleep(self.REOPEN_DELAYS[0])
+            finally:
+                try:
+                    dev.close()
+                except Exception:
+                    pass
+
+    def _read(self, dev):
+        """Read the device until stop() or an error (raised to _run for a reopen)"""
+        decoder = TouchDecoder(use_monotonic_timestamps(dev))
+        packet = []
+        dropped = False
+
+        if hasattr(select, "epoll"):
+            poller = select.epoll()
+            poller.register(dev.fd, select.EPOLLIN | select.EPOLLERR | select.EPOLLHUP)
+            poller.register(self._wake_r, select.EPOLLIN)
+        else:
+            poller = None
+
+        try:
+            while self._running:
+                if poller:
+                    ready = poller.poll()
+                    if any(fd == dev.fd and mask & (select.EPOLLERR | select.EPOLLHUP) for fd, mask in ready):
+                        raise OSError("device hung up")
+                    readable = [fd for fd, _ in ready]
+                else:
+                    readable, _, _ = select.select([dev.fd, self._wake_r], [], [])
+
+                if self._wake_r in readable:
+                    return # stop()
+                if dev.fd not in readable:
+                    continue
+
+                # Everything the kernel has buffered, in one read
+                try:
+                    events = list(dev.read())
+                except BlockingIOError:
+                    continue
+
+                samples = []
+                for event in events:
+                    if event.type == ecodes.EV_SYN and event.code == ecodes.SYN_DROPPED:
+                        # Kernel buffer overrun: drop everything up to the next SYN_REPORT
+                        packet.clear()
+                        dropped = True
+                        continue
+                    packet.append(event)
+                    if event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT:
+                        if not dropped:
+                            for e in packet:
+                                sample = decoder.feed(e)
+                                if sample:
+                                    samples.append(sample)
+                        packet.clear()
+                        dropped = False
+                push_touches(samples)
+        finally:
+            if poller:
+                poller.close()
@@ -0,0 +1,65 @@
+import threading
+
+# --- TOUCH-TO-PHOTON LATENCY ---
+# A touch the screen answers (button, page turn...) waits here with its kernel
+# timestamp until the next frame goes to the panel. When its write completes,
+# the delay is added to the histogram of the mode that was active when the
+# touch came in. If that frame is identical to what the panel shows, the touch
+# had no visible effect and is dropped.
+# A touch is timed once, for its action: in modes that act on release, from
+# the release (the pressed highlight shown on touch-down is not counted).
+
+MAX_LATENCY = 1.0 # s: a touch still not shown after this had no visible effect
+BUCKETS_MS = (10, 20, 33, 50, 75, 100, 150, 250, 500, 1000) # Upper bounds
+
+_waiting = [] # (touch time, mode), main thread only
+_histograms = {} # mode -> [count per bucket, last one for > BUCKETS_MS[-1]]
+_lock = threading.Lock() # Histograms are filled by the present thread
+
+def touched(t, mode):
+    """Main loop: the touch at `t` (time.monotonic clock) changed what mode draws"""
+    _waiting.append((t, mode))
+
+def take(now):
+    """Main loop: the touches the frame about to be written shows"""
+    global _waiting
+    touches = [w for w in _waiting if now - w[0] < MAX_LATENCY]
+    _waiting = []
+    return touches
+
+def presented(touches, done):
+    """The frame carrying `touches` finished its write at `done`"""
+    if not touches:
+        return
+    with _lock:
+        for t, mode in touches:
+            ms = (done - t) * 1000
+            histogram = _histograms.setdefault(mode, [0] * (len(BUCKETS_MS) + 1))
+            bucket = next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))
+            histogram[bucket] += 1
+
+def percentile(mode, p):
+    """Upper bound (ms) of the bucket holding the p-th percentile, None if no data (inf if over the last bucket)"""
+    with _lock:
+        histogram = list(_histograms.get(mode, ()))
+    total = sum(histogram)
+    if not total:
+        return None
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= p * total:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf")
+
+def report():
+    """Log the latency histogram of each mode"""
+    with _lock:
+        histograms = {mode: list(h) for mode, h in _histograms.items()}
+    if not histograms:
+        return
+    print("👆 Touch-to-photon latency (touches per bucket, ms):")
+    labels = [f"≤{b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+    for mode in sorted(histograms):
+        histogram = histograms[mode]
+        buckets = " ".join(f"{label}:{count}" for label, count in zip(labels, histogram) if count)
+        print(f"   {mode:<15} {sum(histogram):4d} touches, p50 ≤{percentile(mode, 0.5)}ms  p99 ≤{percentile(mode, 0.99)}ms  [{buckets}]")
@@ -0,0 +1,50 @@
+import pygame
+from .render_cache import LRUCache
+
+# --- WIDGET LAYOUT ---
+# A screen's buttons are laid out once into a Layout, kept per screen key.
+# The draw code walks layout.widgets and touch dispatch calls layout.hit(pos),
+# so the geometry is written in one place. Widgets are bucketed in a grid of
+# CELL px cells: a hit test only looks at the widgets overlapping one cell.
+
+CELL = 40
+
+class Widget:
+    """A button: where it is drawn, where it reacts to touch, what it does"""
+    def __init__(self, rect, action, hit=None, **data):
+        self.rect = pygame.Rect(rect)
+        self.hit = pygame.Rect(hit) if hit else self.rect # Touch area (can be larger)
+        self.action = action
+        self.data = data
+
+class Layout:
+    def __init__(self):
+        self.widgets = []
+        self._cells = {} # (col, row) -> widgets overlapping the cell
+
+    def add(self, rect, action, hit=None, **data):
+        widget = Widget(rect, action, hit, **data)
+        self.widgets.append(widget)
+        area = widget.hit
+        for col in range(area.left // CELL, (area.right - 1) // CELL + 1):
+            for row in range(area.top // CELL, (area.bottom - 1) // CELL + 1):
+                self._cells.setdefault((col, row), []).append(widget)
+        return widget
+
+    def hit(self, pos):
+        """Widget under pos (the last added wins), or None"""
+        x, y = pos
+        for widget in reversed(self._cells.get((x // CELL, y // CELL), ())):
+            if widget.hit.collidepoint(x, y):
+                return widget
+        return None
+
+# Layouts only depend on their key: built on first use, then reused
+_layouts = LRUCache(64, lambda layout: 1)
+
+def get(key, build):
+    """The Layout for `key` (a tuple of everything the layout depends on), built by build() on a miss"""
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = _layouts.put(key, build())
+    return layout
@@ -1,4 +1,5 @@
-import time
+import os
+import random
 import threading
 import pygame
 import sys
@@ -6,11 +7,81 @@ import subprocess
 from . import config
 from . import display
 from . import inputs
+from . import gestures
+from . import latency
+from . import face_cache
 from . import network
+from . import scheduler
+from . import clock
+from . import tasks
+from . import render_cache
+from . import watchdog
+from .timers import Timers
+from .store import StateStore, SUBTREES
+from . import modes
+# Importing the mode modules registers their screens in modes.MODES
 from .modes import core_modes, messages, apps, media
 from .games import snake
 
-def main():
+def next_deadline(state, now):
+    """Earliest time the loop has work to do, from the active mode and the global timers"""
+    deadlines = []
+    mode = modes.get(state["current_mode"])
+    if mode:
+        deadlines.append(mode.next_deadline(state, now))
+
+    if state.get("is_showing_pop_face"):
+        deadlines.append(core_modes.face_deadline(state, now))
+    if state.get("is_showing_pop_face") or state["current_mode"] not in POP_FACE_EXCLUDED_MODES:
+        deadlines.append(state["timers"].next_due())
+
+    if now - state.get("click_feedback", {}).get("time", 0) < 0.5:
+        deadlines.append(now)
+    deadlines.append(inputs.next_deadline()) # Long press
+
+    deadlines = [d for d in deadlines if d is not None]
+    return min(deadlines) if deadlines else None
+
+# --- GLOBAL TIMERS (pop-up face, inactivity) ---
+# Only run while the pop-up face may interrupt the current screen
+
+def _on_inactivity(state, now):
+    if state.get("is_showing_pop_face"):
+        # Checked again once the pop-up face is gone
+        state["timers"].schedule("inactivity", state["pop_face_end_time"], _on_inactivity)
+        return
+    print("Inactivity timeout: Returning to FACE")
+    state["current_mode"] = "FACE"
+    state["needs_redraw"] = True
+
+def _on_pop_face(state, now):
+    state["is_showing_pop_face"] = True
+    state["pop_face_end_time"] = now + 5.0
+    state["needs_redraw"] = True
+    core_modes.load_random_face(state)
+    state["timers"].schedule("pop_face_end", state["pop_face_end_time"], _on_pop_face_end)
+
+def _on_pop_face_end(state, now):
+    hide_pop_face(state, now)
+
+def hide_pop_face(state, now):
+    state["is_showing_pop_face"] = False
+    state["pop_face_timer"] = now + 60 + (now % 30) # Random delay
+    state["needs_redraw"] = True
+    state["timers"].cancel("pop_face_end")
+    state["timers"].schedule("pop_face", state["pop_face_timer"], _on_pop_face)
+
+def _redraw_if_shown(state, subtree):
+    """Store subscriber: redraw only if the visible screen displays the changed subtree"""
+    shown = modes.get("FACE" if state.get("is_showing_pop_face") else state["current_mode"])
+    if shown and subtree in shown.depends:
+        state["needs_redraw"] = True
+
+# Modes where neither the pop-up face nor the inactivity timeout interrupt
+POP_FACE_EXCLUDED_MODES = ["FACE", "SNAKE", "STARTUP", "GIF_PLAYER", "SLIDESHOW", "RANDOM_GIF", "FOCUS", "MESSAGE_VIEW"]
+
+def setup():
+    """Singleton lock, display, fonts and initial state. Returns (screen, state)."""
     # Singleton Check (Linux/Pi only)
     if not config.IS_WINDOWS:
         try:
@@ -20,8 +91,18 @@ def main():
         except Exception:
             print("BMO is already running!")
             sys.exit(0)
+    else:
+        lock_socket = None
 
     print(f"🤖 Starting {config.IDENTITY}...")
+
+    # Reproducible runs: fixed random seed and/or virtual time
+    if config.RANDOM_SEED is not None:
+        random.seed(config.RANDOM_SEED)
+    if config.VIRTUAL_TIME:
+        clock.set_clock(clock.FrameClock(virtual=True))
+        print(f"⏩ Virtual time: simulating {config.VIRTUAL_TIME:.0f}s")
+    clock.tick()
     
     # Init Display
     screen = display.init_display()
@@ -30,7 +111,7 @@ def main():
     config.init_fonts()
 
     # Init State
-    state = {
+    state = StateStore({
         "current_mode": "STARTUP", # Start with typewriter effect
         "default_mode": config.load_config().get("default_mode", "FACE"),
         "expression": "happy",
@@ -39,18 +120,20 @@ def main():
         "menu_page": 0,
         "loop_running": True,
         "needs_redraw": True,
-        "last_interaction": time.time(),
+        "last_interaction": clock.now(),
+        "power_save": config.load_config().get("power_save", False),
         
         "startup": {
             "message": "Hello Agnès! I'm BMO. Maxence built my brain just for you.",
             "char_index": 0,
-            "start_time": 0,
+            "start_time": None, # Set by the first update
             "char_delay": 0.05
         },
         
         # Identity / Face
         "emotion": "positive",
         "face_images": [],
+        "face_prefetch": {}, # Emotion -> next face pair, loaded by a worker (core_modes.prefetch_faces)
         "current_face_open": None,
         "current_face_closed": None,
         "last_face_switch": 0,
@@ -71,13 +154,13 @@ def main():
             "thought": {
                 "is_active": False,
                 "end_time": 0,
-                "next_time": time.time() + 10, 
+                "next_time": clock.now() + 10, 
                 "current_image": None
             },
             "humming": {
                 "is_active": False,
                 "end_time": 0,
-                "next_time": time.time() + 20,
+                "next_time": clock.now() + 20,
                 "notes": []
             }
         },
@@ -86,14 +169,14 @@ def main():
             "hunger": 80.0,
             "energy": 90.0,
             "play": 70.0,
-            "last_decay": time.time(),
+            "last_decay": clock.now(),
             "hearts": [],
             "show_interaction": False
         },
         
         "click_feedback": {
             "pos": (0, 0),
-            "time": 0
+            "time": float("-inf") # Never clicked (clock.now() starts at 0 in virtual time)
         },
         
         "weather": {
@@ -101,338 +184,279 @@ def main():
              "city": "Unknown",
              "desc": "Loading...",
              "icon": "cloud",
-             "last_update": 0
+             "last_update": None # Never fetched: refresh right away
         },
         
         "random_gif": {
-            "last_trigger": time.time(),
+            "last_trigger": clock.now(),
             "active": False
         },
         
         "is_showing_pop_face": False,
-        "pop_face_timer": time.time() + 60,
+        "pop_face_timer": clock.now() + 60,
         "pop_face_end_time": 0,
         
-        "tap_times": []
-    }
+        "tap_times": [],
+        "timers": Timers()
+    })
+    for subtree in SUBTREES:
+        state.subscribe(subtree, _redraw_if_shown)
+    state["timers"].schedule("pop_face", state["pop_face_timer"], _on_pop_face)
+    state["timers"].schedule("inactivity", state["last_interaction"] + 60, _on_inactivity)
     
     # Load Initial Face
     core_modes.load_random_face(state)
+    # Convert the other faces to the panel format in the background
+    face_cache.start_build()
     
     # Load Data
     network.load_messages(state)
     
-    # Start separate threads
-    running_event = threading.Event()
-    running_event.set()
+    # Keep the instance lock alive as long as the state
+    state["lock_socket"] = lock_socket
+    state["sim_end"] = clock.now() + config.VIRTUAL_TIME
+    return screen, state
+
+def handle_event(state, screen, event):
+    """Apply one pygame event (QUIT, a touch or a gesture) to the state"""
+    if event.type == pygame.QUIT:
+        state["loop_running"] = False
+    elif event.type == pygame.MOUSEBUTTONDOWN:
+        state["last_interaction"] = clock.now()
+        state["timers"].schedule("inactivity", state["last_interaction"] + 60, _on_inactivity)
+        pos = event.pos
+        touch_time = getattr(event, "time", clock.now()) # Set by inputs.collect()
+        
+        # --- 5-Tap Reset Logic ---
+        # Only if NOT composing (typing on T9 triggers this easily)
+        now = clock.now()
+        if not state.get("composing"):
+            state["tap_times"].append(now)
+        # Keep only taps within last 2 seconds
+        state["tap_times"] = [t for t in state["tap_times"] if now - t < 2.0]
+        
+        if len(state["tap_times"]) >= 5:
+            print("🚀 BMO Auto-Update triggered!")
+            # Draw Updating Screen
+            screen.fill(config.BLACK)
+            lbl = config.FONT_MEDIUM.render("UPDATING...", True, config.WHITE)
+            screen.blit(lbl, (config.WIDTH//2 - lbl.get_width()//2, config.HEIGHT//2))
+            display.update_framebuffer(screen)
+            
+            try:
+                # Pull latest code
+                subprocess.call(["git", "pull", "origin", "main"])
+            except Exception as e:
+                print(f"Error during update: {e}")
+            
+            # Exit to let systemd restart
+            sys.exit(0)
+
+        # Pop-up Face Dismissal
+        if state.get("is_showing_pop_face"):
+            hide_pop_face(state, clock.now())
+            state["ignored_contact"] = getattr(event, "contact", None) # Not a tap on the screen below
+            latency.touched(touch_time, "POP_FACE")
+            return
+
+        # Handle Mode Specific Input
+        mode = modes.get(state["current_mode"])
+        if mode and mode.taps_on_release:
+            # Acts on release: only show which widget is pressed
+            lay = mode.layout(state)
+            widget = lay.hit(pos) if lay else None
+            if widget:
+                state["pressed"] = (mode.name, widget, getattr(event, "contact", None))
+                state["pressed_changed"] = True
+            return # Latency is recorded for the tap action, on release
+        if mode:
+            latency.touched(touch_time, mode.name)
+            mode.handle_touch(state, pos)
+            if state["current_mode"] != mode.name:
+                state["ignored_contact"] = getattr(event, "contact", None) # The rest of the touch isn't for the new screen
+        state["needs_redraw"] = True
+        modes.sync_mode(state)
+
+    elif event.type == gestures.GESTURE_EVENT:
+        contact = getattr(event, "contact", None)
+        touch_time = getattr(event, "time", clock.now())
+        pressed = state.get("pressed")
+        if pressed and pressed[2] == contact:
+            # Released, or moved away: the widget is drawn normally again
+            state["pressed"] = None
+            state["needs_redraw"] = True
+        if state.get("is_showing_pop_face") or contact == state.get("ignored_contact"):
+            return
+        mode = modes.get(state["current_mode"])
+        if not mode:
+            return
+        if event.gesture == "tap" and mode.taps_on_release:
+            latency.touched(touch_time, mode.name)
+            mode.handle_touch(state, event.pos)
+            state["needs_redraw"] = True
+        elif mode.handle_gesture(state, event):
+            latency.touched(touch_time, mode.name)
+            state["needs_redraw"] = True
+        modes.sync_mode(state)
+
+def draw_pressed(screen, state):
+    """Darken the widget under the finger. Returns its rect (None if nothing is pressed)."""
+    pressed = state.get("pressed")
+    if not pressed or pressed[0] != state["current_mode"] or state.get("is_showing_pop_face"):
+        return None
+    rect = pressed[1].rect
+    screen.fill((60, 60, 60), rect, special_flags=pygame.BLEND_RGB_SUB)
+    return rect
+
+def run_frame(state, screen, events):
+    """
+    One loop iteration: input, update, draw and present.
+    Returns the time of the next deadline (None = nothing scheduled).
+    The state lock is held for the whole frame: background threads wait for it
+    in StateStore.mutate().
+    """
+    with state.lock:
+        watchdog.begin_frame(state["current_mode"])
+        try:
+            return _frame(state, screen, events)
+        finally:
+            watchdog.end_frame("POP_FACE" if state.get("is_showing_pop_face") else state["current_mode"])
+
+def _frame(state, screen, events):
+    # One time sample per frame: every update and draw below sees the same now
+    now, dt = clock.tick()
+    if config.VIRTUAL_TIME and now >= state["sim_end"]:
+        state["loop_running"] = False
+        return None
+
+    # Event Handling
+    watchdog.enter("input")
+    for event in inputs.collect(events, now):
+        handle_event(state, screen, event)
+
+    # Changes made by background threads since the last frame
+    state.dispatch()
+    if tasks.process_results():
+        state["needs_redraw"] = True # Finished jobs (spinners go away)
+    
+    # Update Logic (Face Animation & Behaviors)
+    watchdog.enter("update")
+    modes.sync_mode(state)
+    mode = modes.get(state["current_mode"])
+    if mode:
+        mode.update(state, dt)
+    modes.sync_mode(state)
+
+    # Pop-up Face Logic
+    # Only if not in attention-demanding modes
+    if state.get("is_showing_pop_face") or state["current_mode"] not in POP_FACE_EXCLUDED_MODES:
+        state["timers"].run_due(state, now)
+    
+    # Update Pop-up Face
+    if state.get("is_showing_pop_face"):
+        core_modes.update_face(state) # Animate the pop-up face
+    
+    # Redraw if needed
+    current_time = now
+
+    # --- VISUAL FEEDBACK (CHECK) ---
+    click_time = state.get("click_feedback", {}).get("time", 0)
+    is_showing_feedback = (current_time - click_time < 0.5)
+    
+    if is_showing_feedback:
+         state["needs_redraw"] = True
+
+    # --- REDRAW LOGIC ---
+    if state["needs_redraw"]:
+        watchdog.enter("draw")
+        
+        # Clear
+        screen.fill(config.BLACK)
+        
+        # Draw Mode
+        mode = state["current_mode"]
+        display.set_scene((mode, state.get("composing", False), state.get("is_showing_pop_face", False)))
+        
+        if state.get("is_showing_pop_face"):
+            core_modes.draw_face(screen, state)
+        elif modes.get(mode):
+            modes.get(mode).draw(screen, state)
+        
+        # --- VISUAL FEEDBACK (DRAW) ---
+        if is_showing_feedback:
+            cx, cy = state["click_feedback"]["pos"]
+            # Draw Cross
+            # White cross with black outline for visibility on light backgrounds
+            size = 10
+            
+            # Outline (Black)
+            pygame.draw.line(screen, (0,0,0), (cx - size, cy), (cx + size, cy), 4)
+            pygame.draw.line(screen, (0,0,0), (cx, cy - size), (cx, cy + size), 4)
+
+            # Main Cross (White)
+            pygame.draw.line(screen, (255,255,255), (cx - size, cy), (cx + size, cy), 2)
+            pygame.draw.line(screen, (255,255,255), (cx, cy - size), (cx, cy + size), 2)
+            display.mark_overlay((cx - size - 2, cy - size - 2, 2 * size + 5, 2 * size + 5))
+
+        pressed = draw_pressed(screen, state)
+        if pressed:
+            display.mark_overlay(pressed)
+        
+        # Push to Framebuffer
+        watchdog.enter("present")
+        display.update_framebuffer(screen)
+        state["needs_redraw"] = False
+        state["pressed_changed"] = False
+
+    elif state.get("pressed_changed"):
+        # Only a button went down: the rest of the screen is still the last frame
+        watchdog.enter("draw")
+        display.mark_dirty(*filter(None, [draw_pressed(screen, state)]))
+        watchdog.enter("present")
+        display.update_framebuffer(screen)
+        state["pressed_changed"] = False
+
+    # Sleep until the active mode's next deadline (or input)
+    if state["needs_redraw"] or state.get("pressed_changed"):
+        return clock.current() # Set by a background thread meanwhile
+    return next_deadline(state, clock.current())
+
+def main():
+    screen, state = setup()
+
+    if config.ASYNC_RUNTIME:
+        from . import aio
+        aio.run(state, screen, run_frame)
+        return
     
-    t_touch = threading.Thread(target=inputs.touch_thread, args=(running_event,), daemon=True)
-    t_touch.start()
+    # Start separate threads
+    touch_reader = inputs.TouchReader()
+    touch_reader.start()
     
     t_net = threading.Thread(target=network.fetch_remote_messages, args=(state,), daemon=True)
     t_net.start()
     
-    clock = pygame.time.Clock()
+    woken_by = []
     
     try:
         while state["loop_running"]:
-            # Event Handling
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    state["loop_running"] = False
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    state["last_interaction"] = time.time()
-                    pos = event.pos
-                    
-                    # --- 5-Tap Reset Logic ---
-                    # Only if NOT composing (typing on T9 triggers this easily)
-                    if not state.get("composing"):
-                        now = time.time()
-                        state["tap_times"].append(now)
-                    # Keep only taps within last 2 seconds
-                    state["tap_times"] = [t for t in state["tap_times"] if now - t < 2.0]
-                    
-                    if len(state["tap_times"]) >= 5:
-                        print("🚀 BMO Auto-Update triggered!")
-                        # Draw Updating Screen
-                        screen.fill(config.BLACK)
-                        lbl = config.FONT_MEDIUM.render("UPDATING...", True, config.WHITE)
-                        screen.blit(lbl, (config.WIDTH//2 - lbl.get_width()//2, config.HEIGHT//2))
-                        display.update_framebuffer(screen)
-                        
-                        try:
-                            # Pull latest code
-                            subprocess.call(["git", "pull", "origin", "main"])
-                        except Exception as e:
-                            print(f"Error during update: {e}")
-                        
-                        # Exit to let systemd restart
-                        sys.exit(0)
-
-                    # Pop-up Face Dismissal
-                    if state.get("is_showing_pop_face"):
-                        state["is_showing_pop_face"] = False
-                        state["pop_face_timer"] = time.time() + 60 + (time.time() % 30) # Random delay
-                        state["needs_redraw"] = True
-                        continue
-
-                    # Handle Mode Specific Input
-                    mode = state["current_mode"]
-                    
-                    if mode == "FACE":
-                        # Tap face to go to menu
-                        state["current_mode"] = "MENU"
-                        state["needs_redraw"] = True
-                        
-                    elif mode == "MENU":
-                        action = core_modes.handle_menu_touch(state, pos)
-                        if action:
-                            if action.startswith("MODE:"):
-                                new_mode = action.split(":")[1]
-                                state["current_mode"] = new_mode
-                                # Snake Init
-                                if new_mode == "SNAKE":
-                                    state["snake"] = snake.SnakeGame(config.WIDTH, config.HEIGHT)
-                                    
-                            elif action.startswith("MENU:"):
-                                menu_name = action.split(":")[1]
-                                state["menu_stack"].append(menu_name)
-                                state["current_menu"] = menu_name
-                                state["menu_page"] = 0
-                                
-                            elif action == "BACK":
-                                if len(state["menu_stack"]) > 1:
-                                    state["menu_stack"].pop()
-                                    state["current_menu"] = state["menu_stack"][-1]
-                                    state["menu_page"] = 0
-                                else:
-                                    state["current_mode"] = "FACE"
-                                    
-                            # --- APP ACTIONS ---
-                            elif action.startswith("FOCUS:"):
-                                mins = int(action.split(":")[1])
-                                apps.start_focus_timer(state, mins)
-                                
-                            elif action.startswith("SLIDESHOW:"):
-                                subdir = action.split(":")[1]
-                                media.start_slideshow(state, subdir)
-                            
-                            elif action.startswith("GIF:"):
-                                subdir = action.split(":")[1]
-                                media.start_gif_player(state, subdir)
-                                 
-                            elif action.startswith("SYSTEM:"):
-                                cmd = action.split(":")[1]
-                                if cmd == "REBOOT":
-                                    os.system("sudo reboot")
-                                    
-                            elif action.startswith("BRIGHTNESS:"):
-                                try:
-                                    val = float(action.split(":")[1])
-                                    with open("/sys/class/backlight/rpi_backlight/brightness", "w") as f:
-                                        f.write(str(int(val * 255)))
-                                    state["brightness"] = val
-                                    config.save_config(state)
-                                except: pass
-                                    
-                            elif action.startswith("SET_POWER:"):
-                                val = action.split(":")[1]
-                                state["power_save"] = (val == "ON")
-                                config.save_config(state)
-                                script = "power_save_on.sh" if state["power_save"] else "power_save_off.sh"
-                                path = os.path.join(config.BASE_DIR, script)
-                                if os.path.exists(path):
-                                    subprocess.run([path], shell=True)
-
-                            state["needs_redraw"] = True
-                            
-                    elif mode == "MESSAGES":
-                        messages.handle_touch(state, pos)
-                        state["needs_redraw"] = True
-                        
-                    elif mode == "MESSAGE_VIEW":
-                        messages.handle_message_view_touch(state, pos)
-                        state["needs_redraw"] = True
-                        
-                    elif mode == "SNAKE":
-                        if state.get("snake"):
-                            res = state["snake"].handle_input(pos)
-                            if res == "EXIT":
-                                state["current_mode"] = "MENU"
-                        state["needs_redraw"] = True
-                    elif mode == "SLIDESHOW":
-                         # Exit slideshow on tap
-                         state["current_mode"] = "MENU"
-                    elif mode == "GIF_PLAYER":
-                        media.handle_gif_touch(state, pos)
-                    elif mode == "FOCUS":
-                         # Exit focus on tap (if finished)
-                         if state["focus"].get("active") == False:
-                             state["current_mode"] = "MENU"
-                    elif mode == "WEATHER" or mode == "ADVANCED_STATS" or mode == "NOTES" or mode == "CLOCK":
-                         # Simple back on tap
-                         state["current_mode"] = "MENU"
-            
-            # Update Logic (Face Animation & Behaviors)
-            # Update Logic (Face Animation & Behaviors)
-            # Update Logic (Face Animation & Behaviors)
-            if state["current_mode"] == "STARTUP":
-                core_modes.update_startup(state)
-            elif state["current_mode"] == "FACE":
-                core_modes.update_face(state)
-                # Random GIF Trigger
-                if time.time() - state["random_gif"].get("last_trigger", 0) > 60:
-                     # 10% chance? Or just trigger? Original logic was just time check + trigger
-                     # But let's add some randomness so it's not exactly every 60s
-                     if int(time.time()) % 10 == 0: 
-                         media.trigger_random_gif(state)
-                         state["random_gif"]["last_trigger"] = time.time()
-                         
-            elif state["current_mode"] == "SLIDESHOW":
-                media.update_slideshow(state)
-            elif state["current_mode"] == "GIF_PLAYER":
-                media.update_gif(state)
-            elif state["current_mode"] == "RANDOM_GIF":
-                media.update_gif(state)
-                # Check Duration
-                if time.time() - state["random_gif"]["start_time"] > state["random_gif"]["duration"]:
-                    state["current_mode"] = "FACE"
-                    state["random_gif"]["active"] = False
-                    state["needs_redraw"] = True
-                    
-            elif state["current_mode"] == "SNAKE":
-                 if state.get("snake"):
-                     state["snake"].update()
-                     state["needs_redraw"] = True
-            elif state["current_mode"] == "FOCUS":
-                if state.get("focus") and state["focus"]["active"]:
-                     if time.time() > state["focus"]["end_time"]:
-                         state["needs_redraw"] = True
-                     elif int(time.time()) % 1 == 0:
-                         state["needs_redraw"] = True
-
-            # Pop-up Face Logic
-            # Only if not in attention-demanding modes
-            if not state.get("is_showing_pop_face") and state["current_mode"] not in ["FACE", "SNAKE", "STARTUP", "GIF_PLAYER", "SLIDESHOW", "RANDOM_GIF", "FOCUS", "MESSAGE_VIEW"]:
-                # Inactivity Timeout (return to FACE)
-                if time.time() - state["last_interaction"] > 60:
-                     print("Inactivity timeout: Returning to FACE")
-                     state["current_mode"] = "FACE"
-                     state["needs_redraw"] = True
-                
-                elif time.time() > state.get("pop_face_timer", 0):
-                    state["is_showing_pop_face"] = True
-                    state["pop_face_end_time"] = time.time() + 5.0
-                    state["needs_redraw"] = True
-                    core_modes.load_random_face(state)
-            
-            # Update Pop-up Face
-            if state.get("is_showing_pop_face"):
-                core_modes.update_face(state) # Animate the pop-up face
-                if time.time() > state.get("pop_face_end_time", 0):
-                    state["is_showing_pop_face"] = False
-                    state["pop_face_timer"] = time.time() + 60 + (time.time() % 30)
-                    state["needs_redraw"] = True
-            
-            # Redraw if needed
-            current_time = time.time()
-            
-            # --- CLOCK UPDATE ---
-            # Ensure clock updates every second
-            if state["current_mode"] == "CLOCK":
-                 if int(current_time) != int(state.get("last_clock_update", 0)):
-                     state["last_clock_update"] = current_time
-                     state["needs_redraw"] = True
-
-            # --- CURSOR BLINK ---
-            if state.get("composing"):
-                # Force redraw every 0.5s for cursor
-                if int(current_time * 2) % 2 == 0:
-                     if not state.get("cursor_visible", False):
-                         state["cursor_visible"] = True
-                         state["needs_redraw"] = True
-                else:
-                     if state.get("cursor_visible", True):
-                         state["cursor_visible"] = False
-                         state["needs_redraw"] = True
-
-            # --- VISUAL FEEDBACK (CHECK) ---
-            click_time = state.get("click_feedback", {}).get("time", 0)
-            is_showing_feedback = (current_time - click_time < 0.5)
-            
-            if is_showing_feedback:
-                 state["needs_redraw"] = True
-
-            # --- REDRAW LOGIC ---
-            if state["needs_redraw"]:
-                
-                # Clear
-                screen.fill(config.BLACK)
-                
-                # Draw Mode
-                mode = state["current_mode"]
-                
-                if state.get("is_showing_pop_face"):
-                    core_modes.draw_face(screen, state)
-                elif state["current_mode"] == "STARTUP":
-                    core_modes.draw_startup(screen, state)
-                elif state["current_mode"] == "FACE":
-                    core_modes.draw_face(screen, state)
-                elif state["current_mode"] == "MENU":
-                    core_modes.draw_menu(screen, state)
-                elif state["current_mode"] == "CLOCK":
-                    core_modes.draw_clock(screen, state)
-                elif state["current_mode"] == "MESSAGES":
-                    messages.draw_messages(screen, state)
-                elif state["current_mode"] == "MESSAGE_VIEW":
-                    messages.draw_message_view(screen, state)
-                elif state["current_mode"] == "RANDOM_GIF":
-                    media.draw_gif(screen, state)
-                
-                # --- NEW APPS ---
-                elif state["current_mode"] == "ADVANCED_STATS":
-                    apps.draw_advanced_stats(screen, state)
-                elif state["current_mode"] == "WEATHER":
-                    apps.draw_weather(screen, state)
-                elif state["current_mode"] == "NOTES":
-                    apps.draw_notes(screen, state)
-                elif state["current_mode"] == "FOCUS":
-                    apps.draw_focus(screen, state)
-                elif state["current_mode"] == "SLIDESHOW":
-                    media.draw_slideshow(screen, state)
-                elif state["current_mode"] == "GIF_PLAYER":
-                    media.draw_gif(screen, state)
-                elif state["current_mode"] == "SNAKE":
-                    if state.get("snake"):
-                        state["snake"].draw(screen)
-                
-                # --- VISUAL FEEDBACK (DRAW) ---
-                if is_showing_feedback:
-                    cx, cy = state["click_feedback"]["pos"]
-                    # Draw Cross
-                    # White cross with black outline for visibility on light backgrounds
-                    size = 10
-                    
-                    # Outline (Black)
-                    pygame.draw.line(screen, (0,0,0), (cx - size, cy), (cx + size, cy), 4)
-                    pygame.draw.line(screen, (0,0,0), (cx, cy - size), (cx, cy + size), 4)
-
-                    # Main Cross (White)
-                    pygame.draw.line(screen, (255,255,255), (cx - size, cy), (cx + size, cy), 2)
-                    pygame.draw.line(screen, (255,255,255), (cx, cy - size), (cx, cy + size), 2)
-                
-                # Push to Framebuffer
-                display.update_framebuffer(screen)
-                state["needs_redraw"] = False
-            
-            # Cap FPS
-            clock.tick(30)
+            frame_start = clock.current()
+            deadline = run_frame(state, screen, woken_by + pygame.event.get())
+            if not state["loop_running"]:
+                break
+            woken_by = scheduler.wait_for_next_frame(deadline, frame_start, state.get("power_save", False))
             
     except KeyboardInterrupt:
         print("Stopping...")
     finally:
-        running_event.clear()
+        touch_reader.stop()
+        tasks.stop()
+        render_cache.report()
+        face_cache.report()
+        scheduler.report()
+        watchdog.report()
         display.cleanup()
+        latency.report() # After cleanup: the last frame has been written
 
 if __name__ == "__main__":
     if sys.platform.startswith('win'):
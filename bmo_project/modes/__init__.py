@@ -1 +1,73 @@
 # Modes package
+
+# --- MODE REGISTRY ---
+# Every screen registers one Mode object under its name (state["current_mode"]).
+# main.py dispatches input, update and draw with a single lookup in MODES.
+MODES = {}
+
+class Mode:
+    """Lifecycle of a screen. Subclasses override only what they need."""
+    name = None
+    # State subtrees (store.SUBTREES) the screen displays: a change to one of
+    # them made outside the mode (network, workers) triggers a redraw
+    depends = ()
+    # False: handle_touch() runs as soon as a finger lands (buttons react at once).
+    # True: it runs on the "tap" gesture instead, so a swipe or a drag starting
+    # on a button doesn't press it.
+    taps_on_release = False
+
+    def enter(self, state):
+        """Called when the mode becomes active"""
+        pass
+
+    def exit(self, state):
+        """Called when leaving the mode: release heavy resources here"""
+        pass
+
+    def update(self, state, dt):
+        pass
+
+    def draw(self, screen, state):
+        pass
+
+    def handle_touch(self, state, pos):
+        pass
+
+    def layout(self, state):
+        """The screen's widgets (layout.Layout) for press feedback, None if it has none"""
+        return None
+
+    def handle_gesture(self, state, gesture):
+        """A gesture (see gestures.GestureRecognizer). Return True to redraw."""
+        return False
+
+    def next_deadline(self, state, now):
+        """Next time the screen changes on its own (None = static)"""
+        return None
+
+def register(mode):
+    """Register a Mode instance under its name"""
+    MODES[mode.name] = mode
+    return mode
+
+def get(name):
+    return MODES.get(name)
+
+def sync_mode(state):
+    """
+    Run exit/enter hooks when state["current_mode"] changed since the last call.
+    Modes switch by assigning state["current_mode"], so this is called by the main
+    loop after input and update.
+    """
+    previous = state.get("active_mode")
+    current = state["current_mode"]
+    if previous == current:
+        return
+    if previous in MODES:
+        MODES[previous].exit(state)
+    state["active_mode"] = current
+    if current in MODES:
+        MODES[current].enter(state)
+    else:
+        print(f"⚠️ Unknown mode {current}")
+    state["needs_redraw"] = True
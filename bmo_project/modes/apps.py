@@ -1,12 +1,19 @@
 import pygame
-import time
-import threading
 import json
 import urllib.request
 import os
+import math
+import random
 from PIL import Image
 from .. import config
+from .. import display
+from .. import clock
+from .. import tasks
 from .. import utils
+from .. import ui_core
+from .. import render_cache
+from .. import scheduler
+from . import Mode, register
 
 # --- WEATHER ---
 def get_weather(state):
@@ -34,47 +41,54 @@ def get_weather(state):
             elif "snow" in desc_lower: icon = "snow"
             elif "storm" in desc_lower or "thunder" in desc_lower: icon = "storm"
             
-            state["weather"].update({
-                "temp": f"{temp}°C",
-                "city": city,
-                "desc": desc,
-                "icon": icon,
-                "last_update": time.time(),
-                "fetching": False
-            })
-            state["needs_redraw"] = True
+            with state.mutate("weather") as weather:
+                weather.update({
+                    "temp": f"{temp}°C",
+                    "city": city,
+                    "desc": desc,
+                    "icon": icon,
+                    "last_update": clock.current()
+                })
             print(f"Weather updated: {city}, {temp}C")
             
     except Exception as e:
         print(f"Error fetching weather: {e}")
-        # On failure, wait 1 minute before retry (set last_update so it doesn't retry immediately if we cleared fetching)
-        # Actually, just set fetching to False. Main loop checks time.
-        # To prevent immediate retry if 20 mins passed, we should fake a last_update to "now - 19 mins"
-        # so it retries in 1 min.
-        state["weather"]["last_update"] = time.time() - 1140 
-        state["weather"]["fetching"] = False
-        state["weather"]["desc"] = "Connection Error"
+        # On failure, fake a last_update of "now - 19 mins" so it retries in 1 min
+        with state.mutate("weather") as weather:
+            weather["last_update"] = clock.current() - 1140 
+            weather["desc"] = "Connection Error"
+
+def refresh_weather(state):
+    """Auto-refresh every 20 mins, on the worker pool"""
+    last_update = state["weather"]["last_update"]
+    if last_update is None or clock.now() - last_update > 1200:
+        if tasks.submit("weather", get_weather, state, unique=True):
+            state["weather"]["desc"] = "Updating..."
+            state["needs_redraw"] = True
+
+def weather_deadline(state, now):
+    if tasks.pending("weather"):
+        return (int(now * 16) + 1) / 16.0 # Spinner
+    if state["weather"]["last_update"] is None:
+        return now
+    return state["weather"]["last_update"] + 1200
 
 def draw_weather(screen, state):
+    weather = state["weather"]
+    key = (weather["city"], weather["temp"], weather["desc"], weather["icon"])
+    render_cache.draw_cached(screen, ("weather",) + key, lambda surf: _render_weather(surf, *key))
+    if tasks.pending("weather"):
+        ui_core.draw_spinner(screen, (config.WIDTH - 25, 20), clock.now())
+
+def _render_weather(screen, city, temp, desc, icon_name):
     screen.fill(config.BLUE) # Nice blue background for weather
-    now = time.time()
-    
-    # Auto-refresh every 20 mins
-    # Ensure nested keys exist
-    if "fetching" not in state["weather"]: state["weather"]["fetching"] = False
-    
-    if (now - state["weather"]["last_update"] > 1200) and not state["weather"]["fetching"]:
-        state["weather"]["fetching"] = True # Lock
-        state["weather"]["desc"] = "Updating..."
-        threading.Thread(target=get_weather, args=(state,), daemon=True).start()
     
     # Header area (City)
     pygame.draw.rect(screen, config.BLACK, (0, 0, config.WIDTH, 40))
-    city_lbl = config.FONT_SMALL.render(state["weather"]["city"].upper(), True, config.WHITE)
+    city_lbl = config.FONT_SMALL.render(city.upper(), True, config.WHITE)
     screen.blit(city_lbl, (config.WIDTH//2 - city_lbl.get_width()//2, 10))
 
     # Icon
-    icon_name = state["weather"]["icon"]
     # Fallback to simple drawing if no image
     # For now, we just draw text if no icon, or simple shapes
     # (Assuming assets might be missing on clean install, we use shapes)
@@ -91,11 +105,10 @@ def draw_weather(screen, state):
         pygame.draw.circle(screen, config.WHITE, (config.WIDTH//2 + 20, 120), 30)
 
     # Temp
-    temp_lbl = config.FONT_LARGE.render(state["weather"]["temp"], True, config.BLACK)
+    temp_lbl = config.FONT_LARGE.render(temp, True, config.BLACK)
     screen.blit(temp_lbl, (config.WIDTH//2 - temp_lbl.get_width()//2, 210))
     
     # Description
-    desc = state["weather"]["desc"]
     desc_lbl = config.FONT_SMALL.render(desc, True, config.BLACK)
     screen.blit(desc_lbl, (config.WIDTH//2 - desc_lbl.get_width()//2, 275))
     
@@ -110,16 +123,25 @@ def start_focus_timer(state, minutes):
         state["focus"] = {}
         
     state["focus"]["duration"] = minutes * 60
-    state["focus"]["end_time"] = time.time() + (minutes * 60)
+    state["focus"]["end_time"] = clock.now() + (minutes * 60)
     state["focus"]["active"] = True
     state["current_mode"] = "FOCUS"
 
+def focus_deadline(state, now):
+    """The countdown text changes every whole second of remaining time"""
+    focus = state.get("focus")
+    if not focus or not focus.get("active"): return None
+    remaining = focus["end_time"] - now
+    if remaining <= 0:
+        return now
+    return now + (remaining % 1.0 or 1.0)
+
 def draw_focus(screen, state):
     screen.fill(config.TEAL)
     
     if "focus" not in state: state["focus"] = {"end_time": 0, "duration": 1, "active": False}
     
-    remaining = state["focus"]["end_time"] - time.time()
+    remaining = state["focus"]["end_time"] - clock.now()
     
     if remaining <= 0:
         # Time's Up! Celebrate!
@@ -174,9 +196,21 @@ def draw_focus(screen, state):
     progress = 1.0 - (remaining / total)
     pygame.draw.rect(screen, config.BLACK, (40, 300, 400, 10), 1)
     pygame.draw.rect(screen, config.GREEN, (41, 301, int(398 * progress), 8))
+    # Only the timer text and progress bar change while running
+    display.mark_dirty((0, 260, config.WIDTH, 50))
 
 # --- STATS ---
 def draw_advanced_stats(screen, state):
+    # Sample first: the rendering is cached per displayed values
+    ip = utils.get_ip_address()
+    wifi = round(utils.get_wifi_strength())
+    temp = round(utils.get_cpu_temp(), 1)
+    ram_p, ram_f = utils.get_ram_usage()
+    wakeups = round(scheduler.wakeup_rate(), 1)
+    key = (ip, wifi, temp, round(ram_p, 1), round(ram_f, 1), wakeups)
+    render_cache.draw_cached(screen, ("stats",) + key, lambda surf: _render_advanced_stats(surf, *key))
+
+def _render_advanced_stats(screen, ip, wifi, temp, ram_p, ram_f, wakeups):
     screen.fill(config.GRAY)
     
     title = config.FONT_MEDIUM.render("BMO SYSTEM STATUS", True, config.WHITE)
@@ -184,12 +218,10 @@ def draw_advanced_stats(screen, state):
     screen.blit(title, (config.WIDTH//2 - title.get_width()//2, 10))
     
     y = 70
-    ip = utils.get_ip_address()
     lbl = config.FONT_SMALL.render(f"IP: {ip}", True, config.BLACK)
     screen.blit(lbl, (40, y))
     
     y += 40
-    wifi = utils.get_wifi_strength()
     lbl = config.FONT_SMALL.render(f"WIFI SIGNAL: {wifi:.0f}%", True, config.BLACK)
     screen.blit(lbl, (40, y))
     pygame.draw.rect(screen, config.BLACK, (40, y+30, 400, 20), 2)
@@ -199,7 +231,6 @@ def draw_advanced_stats(screen, state):
         pygame.draw.rect(screen, color, (42, y+32, w, 16))
     
     y += 70
-    temp = utils.get_cpu_temp()
     lbl = config.FONT_SMALL.render(f"CPU TEMP: {temp:.1f}C", True, config.BLACK)
     screen.blit(lbl, (40, y))
     pygame.draw.rect(screen, config.BLACK, (40, y+30, 400, 20), 2)
@@ -208,7 +239,6 @@ def draw_advanced_stats(screen, state):
     pygame.draw.rect(screen, color, (42, y+32, w, 16))
     
     y += 70
-    ram_p, ram_f = utils.get_ram_usage()
     lbl = config.FONT_SMALL.render(f"RAM: {ram_p:.1f}% ({ram_f:.1f} GB Free)", True, config.BLACK)
     screen.blit(lbl, (40, y))
     pygame.draw.rect(screen, config.BLACK, (40, y+30, 400, 20), 2)
@@ -219,10 +249,17 @@ def draw_advanced_stats(screen, state):
     hint = config.FONT_TINY.render("< TAP TO BACK", True, config.WHITE)
     screen.blit(hint, (20, config.HEIGHT - 20))
 
+    # Main loop wakeups (idle cost)
+    lbl = config.FONT_TINY.render(f"LOOP: {wakeups:.1f} wakeups/s", True, config.WHITE)
+    screen.blit(lbl, (config.WIDTH - 20 - lbl.get_width(), config.HEIGHT - 20))
+
 # --- NOTES ---
 def draw_notes(screen, state):
-    screen.fill(config.RED)
     msg = state.get("love_note", "BMO LOVES YOU!")
+    render_cache.draw_cached(screen, ("notes", msg), lambda surf: _render_note(surf, msg))
+
+def _render_note(screen, msg):
+    screen.fill(config.RED)
     words = msg.split(' ')
     lines = []
     line = []
@@ -245,3 +282,112 @@ def draw_notes(screen, state):
     # Back Hint
     hint = config.FONT_TINY.render("< TAP TO BACK", True, config.WHITE)
     screen.blit(hint, (20, config.HEIGHT - 20))
+
+# --- HEART ---
+def draw_heart(screen, state):
+    """Beating heart (double pulse like a heartbeat)"""
+    screen.fill(config.PINK)
+    t = clock.now() * 1.5
+    pulse = (abs(math.sin(t * math.pi)) ** 30) * 0.5 + (abs(math.sin(t * math.pi - 1.5)) ** 30) * 1.0
+    pulse = min(pulse, 1.2)
+
+    cx, cy = config.WIDTH // 2, config.HEIGHT // 2 - 10
+    size = int(70 + pulse * 20)
+    # Two lobes + a triangle
+    pygame.draw.circle(screen, config.RED, (cx - size // 2, cy - size // 4), size // 2 + 4)
+    pygame.draw.circle(screen, config.RED, (cx + size // 2, cy - size // 4), size // 2 + 4)
+    pygame.draw.polygon(screen, config.RED, [(cx - size - 3, cy - size // 8), (cx + size + 3, cy - size // 8), (cx, cy + size)])
+
+    # Back Hint
+    hint = config.FONT_TINY.render("< TAP TO BACK", True, config.WHITE)
+    screen.blit(hint, (20, config.HEIGHT - 20))
+
+
+# --- MODE REGISTRATION ---
+class WeatherMode(Mode):
+    name = "WEATHER"
+    depends = ("weather",)
+
+    def update(self, state, dt):
+        refresh_weather(state)
+        if tasks.pending("weather"):
+            state["needs_redraw"] = True # Spinner
+
+    def draw(self, screen, state):
+        draw_weather(screen, state)
+
+    def handle_touch(self, state, pos):
+        state["current_mode"] = "MENU"
+
+    def next_deadline(self, state, now):
+        return weather_deadline(state, now)
+
+class FocusMode(Mode):
+    name = "FOCUS"
+
+    def update(self, state, dt):
+        if state.get("focus") and state["focus"]["active"]:
+            state["needs_redraw"] = True
+
+    def draw(self, screen, state):
+        draw_focus(screen, state)
+
+    def handle_touch(self, state, pos):
+        # Exit focus on tap (if finished)
+        if state["focus"].get("active") == False:
+            state["current_mode"] = "MENU"
+
+    def next_deadline(self, state, now):
+        return focus_deadline(state, now)
+
+class AdvancedStatsMode(Mode):
+    name = "ADVANCED_STATS"
+
+    def enter(self, state):
+        state["stats_refresh"] = clock.now() + 5.0
+
+    def update(self, state, dt):
+        # Resample every 5s, the window of scheduler.wakeup_rate()
+        now = clock.now()
+        if now >= state["stats_refresh"]:
+            state["stats_refresh"] = now + 5.0
+            state["needs_redraw"] = True
+
+    def draw(self, screen, state):
+        draw_advanced_stats(screen, state)
+
+    def handle_touch(self, state, pos):
+        state["current_mode"] = "MENU"
+
+    def next_deadline(self, state, now):
+        return state["stats_refresh"]
+
+class NotesMode(Mode):
+    name = "NOTES"
+
+    def enter(self, state):
+        state["love_note"] = random.choice(config.LOVE_NOTES)
+
+    def draw(self, screen, state):
+        draw_notes(screen, state)
+
+    def handle_touch(self, state, pos):
+        state["current_mode"] = "MENU"
+
+class HeartMode(Mode):
+    name = "HEART"
+
+    def update(self, state, dt):
+        state["needs_redraw"] = True # Continuous animation
+
+    def draw(self, screen, state):
+        draw_heart(screen, state)
+
+    def handle_touch(self, state, pos):
+        state["current_mode"] = "MENU"
+
+    def next_deadline(self, state, now):
+        return now
+
+for _mode in (WeatherMode(), FocusMode(), AdvancedStatsMode(), NotesMode(), HeartMode()):
+    register(_mode)
@@ -3,74 +3,127 @@ import time
 import random
 import os
 import sys
+import subprocess
 from PIL import Image
 from .. import config
+from .. import display
+from .. import clock
+from .. import render_cache
+from .. import layout
+from .. import face_cache
+from .. import tasks
+from ..timers import Timers
+from . import Mode, register
+from . import apps, media
+from .. import watchdog
 
 # --- HELPER FUNCTIONS ---
 
-def load_random_face(state, emotion=None):
-    """Load a random face pair. If emotion is None, uses 20% negative chance."""
-    
-    # 20% chance for negative if not forced
-    if emotion is None:
-        emotion = "negative" if random.random() < 0.2 else "positive"
-    
+# --- FACE PREFETCH ---
+# The next face pair of each emotion is picked on the main thread (same random
+# sequence in simulations) and loaded by a worker ahead of time, so a face
+# switch is only a pointer swap. state["face_prefetch"][emotion] holds the
+# ready pair, None while it is loading.
+
+EMOTIONS = ("positive", "negative")
+
+def _pick_face(emotion):
+    """Random face of an emotion (positive if it has none): (emotion, files, filename, open path, closed path)"""
     # Check if target emotion directory has images, fallback if needed
     open_dir = os.path.join(config.BMO_FACES_ROOT, emotion, "open")
-    if not os.path.exists(open_dir) or not [f for f in os.listdir(open_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]:
+    if not face_cache.list_faces(open_dir):
         emotion = "positive" # Fallback to positive
         open_dir = os.path.join(config.BMO_FACES_ROOT, "positive", "open")
-
-    state["emotion"] = emotion
     closed_dir = os.path.join(config.BMO_FACES_ROOT, emotion, "closed")
+
+    # Refreshed when the folder changes
+    files = list(face_cache.list_faces(open_dir))
+    if not files:
+        return None
+    filename = random.choice(files)
+    return emotion, files, filename, os.path.join(open_dir, filename), os.path.join(closed_dir, filename)
+
+def _load_face_pair(pick):
+    """Worker: the surfaces of a picked face"""
+    emotion, files, filename, open_path, closed_path = pick
+    return {
+        "emotion": emotion,
+        "files": files,
+        "filename": filename,
+        # Panel-format frames, converted once (see face_cache.py)
+        "open": face_cache.load(open_path),
+        "closed": face_cache.load(closed_path)
+    }
+
+def prefetch_faces(state):
+    """Start loading the next face pair of each emotion that has none ready"""
+    prefetched = state["face_prefetch"]
+    for emotion in EMOTIONS:
+        name = f"face:{emotion}"
+        if prefetched.get(emotion) is not None or tasks.pending(name):
+            continue
+        pick = _pick_face(emotion)
+        if pick is None:
+            continue
+
+        def on_done(pair, error, emotion=emotion):
+            if pair and pair["open"] is not None:
+                prefetched[emotion] = pair
+
+        if clock.is_virtual():
+            # Simulation: time jumps ahead of the workers, load inline to stay deterministic
+            on_done(_load_face_pair(pick), None)
+        else:
+            tasks.submit(name, _load_face_pair, pick, on_done=on_done, unique=True)
+
+@watchdog.timed
+def load_random_face(state, emotion=None):
+    """
+    Switch to the prefetched face pair. If emotion is None, uses 20% negative chance.
+    Keeps the current face if the pair is still loading.
+    """
     
-    # Always refresh list
-    if os.path.exists(open_dir):
-        state["face_images"] = [f for f in os.listdir(open_dir) 
-                                if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-    else:
-        state["face_images"] = []
-    
-    if state["face_images"]:
-        try:
-            filename = random.choice(state["face_images"])
-            open_path = os.path.join(open_dir, filename)
-            closed_path = os.path.join(closed_dir, filename)
-            
-            # Helper to load and format surface
-            def _prep_surf(path):
-                if not os.path.exists(path): return None
-                img = Image.open(path).convert('RGB')
-                img = img.resize((config.WIDTH, config.HEIGHT), Image.Resampling.BILINEAR)
-                data = img.tobytes()
-                pygame_img = pygame.image.fromstring(data, img.size, img.mode)
-                
-                # OPTIMIZATION: Convert to display format immediately!
-                if config.SURFACE_DEPTH == 16:
-                    # Pi Specific: Create 16-bit surface and blit
-                    surf = pygame.Surface((config.WIDTH, config.HEIGHT), depth=16, masks=config.SURFACE_MASKS)
-                    surf.blit(pygame_img, (0, 0))
-                    return surf
-                else:
-                    return pygame_img.convert()
-
-            state["current_face_open"] = _prep_surf(open_path)
-            state["current_face_closed"] = _prep_surf(closed_path)
+    # 20% chance for negative if not forced
+    if emotion is None:
+        emotion = "negative" if random.random() < 0.2 else "positive"
+
+    pair = state["face_prefetch"].get(emotion)
+    try:
+        if pair is None:
+            if state.get("current_face_open") is not None:
+                print(f"Next {emotion} face not loaded yet, keeping the current one")
+                return
+            # No face at all yet (startup): nothing to keep, load one now
+            pick = _pick_face(emotion)
+            if pick is None:
+                state["face_images"] = []
+                return
+            pair = _load_face_pair(pick)
+
+        # Pointer swap
+        state["face_prefetch"][emotion] = None
+        state["emotion"] = pair["emotion"]
+        state["face_images"] = pair["files"]
+        state["current_face_open"] = pair["open"]
+        state["current_face_closed"] = pair["closed"]
+        
+        # Fallback if closed version doesn't exist
+        if state["current_face_closed"] is None:
+            state["current_face_closed"] = state["current_face_open"]
+            print(f"Loaded {pair['emotion']} face: {pair['filename']} (no closed version)")
+        else:
+            print(f"Loaded {pair['emotion']} face: {pair['filename']} (with blink version)")
             
-            # Fallback if closed version doesn't exist
-            if state["current_face_closed"] is None:
-                state["current_face_closed"] = state["current_face_open"]
-                print(f"Loaded {emotion} face: {filename} (no closed version)")
-            else:
-                print(f"Loaded {emotion} face: {filename} (with blink version)")
-                
-            state["last_face_switch"] = time.time()
-            state["needs_redraw"] = True
-            sys.stdout.flush()
-        except Exception as e:
-            print(f"Error loading face images: {e}")
-            sys.stdout.flush()
+        state["last_face_switch"] = clock.now()
+        state["needs_redraw"] = True
+        sys.stdout.flush()
+    except Exception as e:
+        print(f"Error loading face images: {e}")
+        sys.stdout.flush()
+    finally:
+        prefetch_faces(state)
 
+@watchdog.timed
 def load_thought_bubble():
     """Load a random thought bubble icon"""
     if not os.path.exists(config.IDLE_THOUGHT_DIR): return None
@@ -98,7 +151,7 @@ def draw_music_note(screen, pos, alpha):
 
 def draw_click_crosshair(screen, state):
     """Draw a simple visual crosshair feedback at the last click position"""
-    now = time.time()
+    now = clock.now()
     diff = now - state["click_feedback"]["time"]
     if diff < 1.0:
         x, y = state["click_feedback"]["pos"]
@@ -111,119 +164,181 @@ def draw_click_crosshair(screen, state):
         pygame.draw.line(cross_surf, color, (15, 0), (15, 30), 2)
         
         screen.blit(cross_surf, (x - 15, y - 15))
+        display.mark_overlay((x - 15, y - 15, 30, 30))
         state["needs_redraw"] = True
 
-# --- MAIN FUNCTIONS ---
+# --- FACE TIMERS ---
+# Each idle behavior is a timer in state["face_timers"]: update_face only runs
+# the ones that are due instead of comparing every timestamp on every frame.
 
-def update_face(state):
-    """Update BMO's face state (blinking, image rotation, and needs)"""
-    now = time.time()
-    
-    # --- NEEDS DECAY ---
+def _face_interval(state):
+    # Dynamic rotation interval
+    return 22.5 if state.get("emotion") == "negative" else 45.0
+
+def _on_decay(state, now):
     # Decay every 30 seconds for performance
-    if now - state["needs"]["last_decay"] > 30:
-        elapsed_mins = (now - state["needs"]["last_decay"]) / 60.0
-        # Decay rates (per minute)
-        state["needs"]["hunger"] = max(0, state["needs"]["hunger"] - (0.11 * elapsed_mins))
-        state["needs"]["play"] = max(0, state["needs"]["play"] - (0.16 * elapsed_mins))
-        state["needs"]["energy"] = max(0, state["needs"]["energy"] - (0.08 * elapsed_mins))
-        state["needs"]["last_decay"] = now
-        
-        # Update Emotion based on needs
-        avg = (state["needs"]["hunger"] + state["needs"]["play"] + state["needs"]["energy"]) / 3.0
-        if avg < 40:
-            if state["emotion"] != "negative":
-                print("BMO feels sad/neglected...")
-                state["emotion"] = "negative"
-                load_random_face(state)
-        elif avg > 60:
-            if state["emotion"] != "positive":
-                print("BMO feels happy and cared for!")
-                state["emotion"] = "positive"
-                load_random_face(state)
+    elapsed_mins = (now - state["needs"]["last_decay"]) / 60.0
+    # Decay rates (per minute)
+    state["needs"]["hunger"] = max(0, state["needs"]["hunger"] - (0.11 * elapsed_mins))
+    state["needs"]["play"] = max(0, state["needs"]["play"] - (0.16 * elapsed_mins))
+    state["needs"]["energy"] = max(0, state["needs"]["energy"] - (0.08 * elapsed_mins))
+    state["needs"]["last_decay"] = now
+    state["face_timers"].schedule("decay", now + 30, _on_decay)
 
-    # --- HEARTS ANIMATION ---
-    still_alive = []
-    for h in state["needs"]["hearts"]:
-        if now < h["end_time"]:
-            h["pos"][0] += h["vel"][0]
-            h["pos"][1] += h["vel"][1]
-            still_alive.append(h)
-            state["needs_redraw"] = True
-    state["needs"]["hearts"] = still_alive
+    # Update Emotion based on needs
+    avg = (state["needs"]["hunger"] + state["needs"]["play"] + state["needs"]["energy"]) / 3.0
+    if avg < 40:
+        if state["emotion"] != "negative":
+            print("BMO feels sad/neglected...")
+            state["emotion"] = "negative"
+            load_random_face(state)
+    elif avg > 60:
+        if state["emotion"] != "positive":
+            print("BMO feels happy and cared for!")
+            state["emotion"] = "positive"
+            load_random_face(state)
 
-    # Dynamic rotation interval 
-    interval = 22.5 if state.get("emotion") == "negative" else 45.0
-    
-    if now - state["last_face_switch"] > interval:
+def _on_rotate(state, now):
+    # load_random_face() may have been called elsewhere since this was armed
+    interval = _face_interval(state)
+    if now - state["last_face_switch"] >= interval:
         print(f"Rotating face image (Emotion: {state.get('emotion')}, Interval: {interval}s)...")
         state["last_face_switch"] = now # Update immediately to prevent spam if load fails/empty
         load_random_face(state)
-    
+    state["face_timers"].schedule("rotate", state["last_face_switch"] + _face_interval(state), _on_rotate)
+
+def _on_blink(state, now):
     # Blinking logic (decreased frequency: 8-20 seconds)
     if state["is_blinking"]:
-        if now > state["blink_end_time"]:
-            state["is_blinking"] = False
-            state["blink_timer"] = now + random.uniform(8.0, 20.0)
-            state["needs_redraw"] = True
+        state["is_blinking"] = False
+        state["blink_timer"] = now + random.uniform(8.0, 20.0)
+        state["face_timers"].schedule("blink", state["blink_timer"], _on_blink)
     else:
-        if now > state["blink_timer"]:
-            print("BMO Blink!")
-            state["is_blinking"] = True
-            state["blink_end_time"] = now + 0.15 # Blink duration
+        print("BMO Blink!")
+        state["is_blinking"] = True
+        state["blink_end_time"] = now + 0.15 # Blink duration
+        state["face_timers"].schedule("blink", state["blink_end_time"], _on_blink)
+    state["needs_redraw"] = True
+
+def _on_thought(state, now):
+    thought = state["idle"]["thought"]
+    if not thought["is_active"]:
+        surf = load_thought_bubble()
+        if surf:
+            print("BMO is thinking...")
+            thought["is_active"] = True
+            thought["current_image"] = surf
+            thought["end_time"] = now + random.uniform(5, 10)
+            state["face_timers"].schedule("thought", thought["end_time"], _on_thought)
             state["needs_redraw"] = True
-            
-    # --- IDLE BEHAVIORS ---
-    # 1. Thought Bubbles
-    if not state["idle"]["thought"]["is_active"]:
-        if now > state["idle"]["thought"]["next_time"]:
-            surf = load_thought_bubble()
-            if surf:
-                print("BMO is thinking...")
-                state["idle"]["thought"]["is_active"] = True
-                state["idle"]["thought"]["current_image"] = surf
-                state["idle"]["thought"]["end_time"] = now + random.uniform(5, 10)
-                state["needs_redraw"] = True
+        else:
+            thought["next_time"] = now + random.uniform(30, 120)
+            state["face_timers"].schedule("thought", thought["next_time"], _on_thought)
     else:
-        if now > state["idle"]["thought"]["end_time"]:
-            state["idle"]["thought"]["is_active"] = False
-            state["idle"]["thought"]["next_time"] = now + random.uniform(30, 120)
-            state["needs_redraw"] = True
+        thought["is_active"] = False
+        thought["next_time"] = now + random.uniform(30, 120)
+        state["face_timers"].schedule("thought", thought["next_time"], _on_thought)
+        state["needs_redraw"] = True
+
+def _on_humming(state, now):
+    humming = state["idle"]["humming"]
+    timers = state["face_timers"]
+    if not humming["is_active"]:
+        # Only when positive
+        if state["emotion"] != "positive":
+            humming["next_time"] = now + random.uniform(20, 90)
+            timers.schedule("humming", humming["next_time"], _on_humming)
+            return
+        print("BMO is humming...")
+        humming["is_active"] = True
+        humming["end_time"] = now + random.uniform(6, 12)
+        humming["notes"] = []
+        timers.schedule("humming", humming["end_time"], _on_humming)
+        timers.schedule("note", now, _on_note)
+        state["needs_redraw"] = True
+    elif humming["notes"]:
+        # Wait for notes to vanish
+        timers.schedule("humming", max(n["start"] + n["life"] for n in humming["notes"]), _on_humming)
+    else:
+        humming["is_active"] = False
+        humming["next_time"] = now + random.uniform(20, 90)
+        timers.schedule("humming", humming["next_time"], _on_humming)
+        state["needs_redraw"] = True
+
+def _on_note(state, now):
+    # Spawn new notes (about 3 per second while humming)
+    humming = state["idle"]["humming"]
+    if now >= humming["end_time"]:
+        return
+    humming["notes"].append({
+        "pos": [random.uniform(100, config.WIDTH-100), 280],
+        "vel": [random.uniform(-0.5, 0.5), random.uniform(-1.5, -2.5)],
+        "start": now,
+        "life": random.uniform(2, 4)
+    })
+    state["face_timers"].schedule("note", now + random.expovariate(3.0), _on_note)
+
+def _on_random_gif(state, now):
+    # Some randomness so it's not exactly every 60s: fire on a whole 10 seconds
+    if state["current_mode"] != "FACE":
+        # Pop-up face over another screen: try again on the next slot
+        state["face_timers"].schedule("random_gif", _random_gif_slot(now), _on_random_gif)
+        return
+    media.trigger_random_gif(state)
+    state["random_gif"]["last_trigger"] = now
+    state["face_timers"].schedule("random_gif", _random_gif_slot(now + 60), _on_random_gif)
 
-    # 2. Humming (Only when positive)
-    if state["emotion"] == "positive":
-        if not state["idle"]["humming"]["is_active"]:
-            if now > state["idle"]["humming"]["next_time"]:
-                print("BMO is humming...")
-                state["idle"]["humming"]["is_active"] = True
-                state["idle"]["humming"]["end_time"] = now + random.uniform(6, 12)
-                state["idle"]["humming"]["notes"] = []
+def _random_gif_slot(after):
+    return (int(after) // 10 + 1) * 10
+
+def get_face_timers(state):
+    """Face timer heap, armed from the initial state timestamps on first use"""
+    timers = state.get("face_timers")
+    if timers is None:
+        timers = state["face_timers"] = Timers()
+        idle = state["idle"]
+        timers.schedule("decay", state["needs"]["last_decay"] + 30, _on_decay)
+        timers.schedule("rotate", state["last_face_switch"] + _face_interval(state), _on_rotate)
+        timers.schedule("blink", state["blink_end_time"] if state["is_blinking"] else state["blink_timer"], _on_blink)
+        timers.schedule("thought", idle["thought"]["end_time"] if idle["thought"]["is_active"] else idle["thought"]["next_time"], _on_thought)
+        timers.schedule("humming", idle["humming"]["end_time"] if idle["humming"]["is_active"] else idle["humming"]["next_time"], _on_humming)
+        timers.schedule("random_gif", _random_gif_slot(state["random_gif"].get("last_trigger", 0) + 60), _on_random_gif)
+    return timers
+
+# --- MAIN FUNCTIONS ---
+
+def update_face(state):
+    """Update BMO's face state (blinking, image rotation, and needs)"""
+    now = clock.now()
+    get_face_timers(state).run_due(state, now)
+
+    # --- HEARTS ANIMATION ---
+    if state["needs"]["hearts"]:
+        still_alive = []
+        for h in state["needs"]["hearts"]:
+            if now < h["end_time"]:
+                h["pos"][0] += h["vel"][0]
+                h["pos"][1] += h["vel"][1]
+                still_alive.append(h)
                 state["needs_redraw"] = True
-        else:
-            if now > state["idle"]["humming"]["end_time"]:
-                if not state["idle"]["humming"]["notes"]: # Wait for notes to vanish
-                    state["idle"]["humming"]["is_active"] = False
-                    state["idle"]["humming"]["next_time"] = now + random.uniform(20, 90)
-                    state["needs_redraw"] = True
-            
-            # Spawn new notes
-            if now < state["idle"]["humming"]["end_time"] and random.random() < 0.1:
-                state["idle"]["humming"]["notes"].append({
-                    "pos": [random.uniform(100, config.WIDTH-100), 280],
-                    "vel": [random.uniform(-0.5, 0.5), random.uniform(-1.5, -2.5)],
-                    "start": now,
-                    "life": random.uniform(2, 4)
-                })
-
-            # Update notes
-            still_alive = []
-            for n in state["idle"]["humming"]["notes"]:
-                if now - n["start"] < n["life"]:
-                    n["pos"][0] += n["vel"][0]
-                    n["pos"][1] += n["vel"][1]
-                    still_alive.append(n)
-                    state["needs_redraw"] = True
-            state["idle"]["humming"]["notes"] = still_alive
+        state["needs"]["hearts"] = still_alive
+
+    # Update notes
+    if state["idle"]["humming"]["notes"]:
+        still_alive = []
+        for n in state["idle"]["humming"]["notes"]:
+            if now - n["start"] < n["life"]:
+                n["pos"][0] += n["vel"][0]
+                n["pos"][1] += n["vel"][1]
+                still_alive.append(n)
+                state["needs_redraw"] = True
+        state["idle"]["humming"]["notes"] = still_alive
+
+def face_deadline(state, now):
+    """Earliest time update_face has something to do (next due timer, or now while animating)"""
+    if state["needs"]["hearts"] or state["idle"]["humming"]["notes"]:
+        return now # Animating
+    return get_face_timers(state).next_due()
 
 def draw_face(screen, state):
     # No need to fill with BLACK if we are blitting a full-screen image
@@ -303,17 +418,20 @@ def draw_face(screen, state):
         txt = config.FONT_TINY.render("!", True, config.WHITE)
         screen.blit(txt, (config.WIDTH - 30 - txt.get_width()//2, config.HEIGHT - 30 - txt.get_height()//2))
 
-def draw_menu(screen, state):
-    screen.fill(config.WHITE)
-    
+    # Damage: if the static layers did not change since the last draw,
+    # only the moving notes and hearts need to reach the panel
+    sig = (id(target_surf), id(state["idle"]["thought"]["current_image"]) if state["idle"]["thought"]["is_active"] else None,
+           state["needs"]["show_interaction"], state["messages"]["unread"])
+    if sig == state.get("face_draw_sig"):
+        display.mark_dirty(*[(int(n["pos"][0]) - 8, int(n["pos"][1]) - 20, 24, 30) for n in state["idle"]["humming"]["notes"]])
+        display.mark_dirty(*[(int(h["pos"][0]) - 10, int(h["pos"][1]) - 6, 20, 18) for h in state["needs"]["hearts"]])
+    state["face_draw_sig"] = sig
+
+def _menu_page(state):
+    """(menu id, items, clamped page, page count) of the menu on screen"""
     current_menu_id = state.get("current_menu", "MAIN")
     items = config.MENUS.get(current_menu_id, config.MENUS["MAIN"])
     
-    # Header
-    pygame.draw.rect(screen, config.BLACK, (0, 0, config.WIDTH, 50))
-    title = config.FONT_MEDIUM.render(f"BMO MENU: {current_menu_id}", True, config.WHITE)
-    screen.blit(title, (config.WIDTH//2 - title.get_width()//2, 10))
-    
     # Pagination Logic (2x2 Grid = 4 items per page)
     items_per_page = 4
     total_pages = (len(items) + items_per_page - 1) // items_per_page
@@ -322,8 +440,16 @@ def draw_menu(screen, state):
     page = state.get("menu_page", 0)
     if page >= total_pages: page = total_pages - 1
     if page < 0: page = 0
-    state["menu_page"] = page
-    
+    return current_menu_id, items, page, total_pages
+
+def menu_layout(state):
+    """Buttons of the menu page on screen (items, then PREV / NEXT)"""
+    current_menu_id, items, page, total_pages = _menu_page(state)
+    return layout.get(("menu", current_menu_id, page), lambda: _build_menu_layout(items, page, total_pages))
+
+def _build_menu_layout(items, page, total_pages):
+    lay = layout.Layout()
+    items_per_page = 4
     start_idx = page * items_per_page
     visible_items = items[start_idx:start_idx + items_per_page]
     
@@ -334,15 +460,51 @@ def draw_menu(screen, state):
     start_x = (config.WIDTH - (cols * btn_w + (cols-1) * gap)) // 2
     start_y = 70
     
-    # Draw Menu Items in Grid
+    # Menu Items in Grid
     for i, item in enumerate(visible_items):
         r = i // cols
         c = i % cols
         bx = start_x + c * (btn_w + gap)
         by = start_y + r * (btn_h + gap)
-        
-        btn_rect = (bx, by, btn_w, btn_h)
-        pygame.draw.rect(screen, item.get("color", config.GRAY), btn_rect, border_radius=10)
+        lay.add((bx, by, btn_w, btn_h), item["action"], item=item, radius=10)
+
+    # Navigation Buttons (Centered at Bottom)
+    nav_y = 250
+    nav_h = 45
+    if page > 0:
+        lay.add((start_x, nav_y, btn_w, nav_h), "PAGE:-1", label="< PREV", radius=5)
+    if page < total_pages - 1:
+        lay.add((start_x + btn_w + gap, nav_y, btn_w, nav_h), "PAGE:1", label="NEXT >", radius=5)
+    return lay
+
+def draw_menu(screen, state):
+    current_menu_id, items, page, total_pages = _menu_page(state)
+    state["menu_page"] = page
+    lay = menu_layout(state)
+
+    # The page only depends on (menu, page): rendered once, then blitted
+    render_cache.draw_cached(screen, ("menu", current_menu_id, page),
+                             lambda surf: _render_menu_page(surf, current_menu_id, lay))
+
+def _render_menu_page(screen, current_menu_id, lay):
+    screen.fill(config.WHITE)
+    
+    # Header
+    pygame.draw.rect(screen, config.BLACK, (0, 0, config.WIDTH, 50))
+    title = config.FONT_MEDIUM.render(f"BMO MENU: {current_menu_id}", True, config.WHITE)
+    screen.blit(title, (config.WIDTH//2 - title.get_width()//2, 10))
+    
+    for w in lay.widgets:
+        bx, by, btn_w, btn_h = w.rect
+        if w.action.startswith("PAGE:"):
+            # PREV / NEXT Button
+            pygame.draw.rect(screen, config.GRAY, w.rect, border_radius=5)
+            lbl = config.FONT_SMALL.render(w.data["label"], True, config.BLACK)
+            screen.blit(lbl, (bx + (btn_w - lbl.get_width())//2, by + 10))
+            continue
+
+        item = w.data["item"]
+        pygame.draw.rect(screen, item.get("color", config.GRAY), w.rect, border_radius=10)
         
         # Two-line text wrapping if too long
         label = item["label"]
@@ -357,85 +519,115 @@ def draw_menu(screen, state):
             lbl = config.FONT_SMALL.render(label, True, config.BLACK)
             screen.blit(lbl, (bx + (btn_w - lbl.get_width())//2, by + (btn_h - lbl.get_height())//2))
 
-    # Draw Navigation Buttons (Centered at Bottom)
-    nav_y = 250
-    nav_h = 45
-    
-    if page > 0:
-        # PREV Button
-        prev_rect = (start_x, nav_y, btn_w, nav_h)
-        pygame.draw.rect(screen, config.GRAY, prev_rect, border_radius=5)
-        lbl = config.FONT_SMALL.render("< PREV", True, config.BLACK)
-        screen.blit(lbl, (prev_rect[0] + (btn_w - lbl.get_width())//2, nav_y + 10))
-        
-    if page < total_pages - 1:
-        # NEXT Button
-        next_rect = (start_x + btn_w + gap, nav_y, btn_w, nav_h)
-        pygame.draw.rect(screen, config.GRAY, next_rect, border_radius=5)
-        lbl = config.FONT_SMALL.render("NEXT >", True, config.BLACK)
-        screen.blit(lbl, (next_rect[0] + (btn_w - lbl.get_width())//2, nav_y + 10))
-
 def handle_menu_touch(state, pos):
-    x, y = pos
-    current_menu_id = state.get("current_menu", "MAIN")
-    items = config.MENUS.get(current_menu_id, config.MENUS["MAIN"])
-    
-    # Pagination Logic
-    items_per_page = 4
-    total_pages = (len(items) + items_per_page - 1) // items_per_page
-    page = state.get("menu_page", 0)
-    
-    start_idx = page * items_per_page
-    visible_items = items[start_idx:start_idx + items_per_page]
-    
-    # Layout Params (Same as draw)
-    cols, rows = 2, 2
-    btn_w, btn_h = 190, 70
-    gap = 20
-    start_x = (config.WIDTH - (cols * btn_w + (cols-1) * gap)) // 2
-    start_y = 70
-    
-    # Check Item Clicks
-    for i, item in enumerate(visible_items):
-        r = i // cols
-        c = i % cols
-        bx = start_x + c * (btn_w + gap)
-        by = start_y + r * (btn_h + gap)
-        
-        if bx <= x <= bx + btn_w and by <= y <= by + btn_h:
-            return item["action"]
-            
-    # Check Nav Buttons
-    nav_y = 250
-    nav_h = 45
-    
-    if page > 0:
-        prev_rect = (start_x, nav_y, btn_w, nav_h)
-        if prev_rect[0] <= x <= prev_rect[0] + btn_w and prev_rect[1] <= y <= prev_rect[1] + nav_h:
-            state["menu_page"] = page - 1
-            return None
-            
-    if page < total_pages - 1:
-        next_rect = (start_x + btn_w + gap, nav_y, btn_w, nav_h)
-        if next_rect[0] <= x <= next_rect[0] + btn_w and next_rect[1] <= y <= next_rect[1] + nav_h:
-            state["menu_page"] = page + 1
-            return None
-            
-    return None
+    """Action of the menu item under pos (page buttons are handled here), or None"""
+    w = menu_layout(state).hit(pos)
+    if w is None:
+        return None
+    if w.action.startswith("PAGE:"):
+        turn_menu_page(state, int(w.action.split(":")[1]))
+        return None
+    return w.action
+
+def turn_menu_page(state, step):
+    """Move `step` pages (PREV / NEXT, swipe paging). Returns True if the page changed."""
+    _, _, page, total_pages = _menu_page(state)
+    new_page = max(0, min(total_pages - 1, page + step))
+    if new_page == page:
+        return False
+    state["menu_page"] = new_page
+    return True
+
+def handle_menu_action(state, action):
+    """Run a menu action (see config.MENUS)"""
+    if action.startswith("MODE:"):
+        state["current_mode"] = action.split(":")[1]
+
+    elif action.startswith("MENU:"):
+        menu_name = action.split(":")[1]
+        state["menu_stack"].append(menu_name)
+        state["current_menu"] = menu_name
+        state["menu_page"] = 0
+
+    elif action == "BACK":
+        if len(state["menu_stack"]) > 1:
+            state["menu_stack"].pop()
+            state["current_menu"] = state["menu_stack"][-1]
+            state["menu_page"] = 0
+        else:
+            state["current_mode"] = "FACE"
+
+    # --- APP ACTIONS ---
+    elif action.startswith("FOCUS:"):
+        mins = int(action.split(":")[1])
+        apps.start_focus_timer(state, mins)
+
+    elif action.startswith("SLIDESHOW:"):
+        subdir = action.split(":")[1]
+        media.start_slideshow(state, subdir)
+
+    elif action.startswith("GIF:"):
+        subdir = action.split(":")[1]
+        media.start_gif_player(state, subdir)
+
+    elif action.startswith("TEXT:"):
+        subdir = action.split(":")[1]
+        media.start_text_viewer(state, subdir)
+
+    elif action.startswith("SYSTEM:"):
+        cmd = action.split(":")[1]
+        if cmd == "REBOOT":
+            os.system("sudo reboot")
+
+    elif action.startswith("BRIGHTNESS:"):
+        try:
+            val = float(action.split(":")[1])
+            with open("/sys/class/backlight/rpi_backlight/brightness", "w") as f:
+                f.write(str(int(val * 255)))
+            state["brightness"] = val
+            config.save_config(state)
+        except: pass
+
+    elif action.startswith("SET_POWER:"):
+        val = action.split(":")[1]
+        state["power_save"] = (val == "ON")
+        config.save_config(state)
+        script = "power_save_on.sh" if state["power_save"] else "power_save_off.sh"
+        path = os.path.join(config.BASE_DIR, script)
+        if os.path.exists(path):
+            subprocess.run([path], shell=True)
+
+    elif action.startswith("SET_DEFAULT:"):
+        state["default_mode"] = action.split(":")[1]
+        config.save_config(state)
+        print(f"Boot mode set to {state['default_mode']}")
+
+    else:
+        print(f"⚠️ Unhandled menu action: {action}")
 
 def draw_clock(screen, state):
-    screen.fill(config.BLUE)
     t = time.strftime("%H:%M:%S")
     d = time.strftime("%A, %b %d")
+    # Background, date and hint change once a day at most
+    render_cache.draw_cached(screen, ("clock", d), lambda surf: _render_clock_background(surf, d))
     lbl_t = config.FONT_LARGE.render(t, True, config.WHITE)
-    lbl_d = config.FONT_MEDIUM.render(d, True, config.WHITE)
     screen.blit(lbl_t, (config.WIDTH//2 - lbl_t.get_width()//2, 100))
+    # Only the time/date band changes between ticks
+    display.mark_dirty((0, 100, config.WIDTH, 80 + config.FONT_MEDIUM.get_height()))
+
+def _render_clock_background(screen, d):
+    screen.fill(config.BLUE)
+    lbl_d = config.FONT_MEDIUM.render(d, True, config.WHITE)
     screen.blit(lbl_d, (config.WIDTH//2 - lbl_d.get_width()//2, 180))
     
     # Back Hint
     hint = config.FONT_TINY.render("< TAP TO BACK", True, config.WHITE)
     screen.blit(hint, (20, config.HEIGHT - 20))
 
+def clock_deadline(state, now):
+    """The clock only changes on the next wall-clock second"""
+    return now + 1.0 - (time.time() % 1.0)
+
 def draw_stats(screen, state):
     # Placeholder for system stats
     screen.fill(config.YELLOW)
@@ -446,10 +638,10 @@ def draw_stats(screen, state):
 # --- STARTUP MODE ---
 def update_startup(state):
     """Update typewriter animation"""
-    if state["startup"]["start_time"] == 0:
-        state["startup"]["start_time"] = time.time()
+    if state["startup"]["start_time"] is None:
+        state["startup"]["start_time"] = clock.now()
     
-    elapsed = time.time() - state["startup"]["start_time"]
+    elapsed = clock.now() - state["startup"]["start_time"]
     # 50ms per char = 20 chars per second
     target_chars = int(elapsed / state["startup"]["char_delay"])
     
@@ -460,6 +652,8 @@ def update_startup(state):
         if elapsed > (msg_len * state["startup"]["char_delay"]) + 2.0:
             print(f"Startup complete, moving to {state.get('default_mode', 'FACE')}")
             default = state.get("default_mode", "FACE")
+            # Boot mode names from the SETTINGS menu that differ from the mode name
+            default = {"STATS": "ADVANCED_STATS"}.get(default, default)
             state["current_mode"] = default
             # If face, ensure it's loaded
             if default == "FACE":
@@ -470,6 +664,17 @@ def update_startup(state):
             state["startup"]["char_index"] = target_chars
             state["needs_redraw"] = True
 
+def startup_deadline(state, now):
+    """Next typed character, cursor blink or the end of the startup screen"""
+    startup = state["startup"]
+    if startup["start_time"] is None:
+        return now
+    msg_len = len(startup["message"])
+    if startup["char_index"] < msg_len:
+        next_char = startup["start_time"] + (startup["char_index"] + 1) * startup["char_delay"]
+        return min(next_char, (int(now * 2) + 1) / 2.0)
+    return startup["start_time"] + msg_len * startup["char_delay"] + 2.0
+
 def draw_startup(screen, state):
     screen.fill(config.BLACK) # Using BLACK for startup contrast
     
@@ -499,7 +704,7 @@ def draw_startup(screen, state):
     
     # Blinking cursor
     if state["startup"]["char_index"] < len(message):
-        if int(time.time() * 2) % 2 == 0:  # Blink every 0.5s
+        if int(clock.now() * 2) % 2 == 0:  # Blink every 0.5s
             cursor = config.FONT_MEDIUM.render("_", False, config.WHITE)
             # Position cursor at end of last line
             last_line_content = lines[-1] if lines else ""
@@ -508,3 +713,76 @@ def draw_startup(screen, state):
             cursor_y = y - 30
             screen.blit(cursor, (cursor_x, cursor_y))
 
+
+# --- MODE REGISTRATION ---
+class StartupMode(Mode):
+    name = "STARTUP"
+
+    def update(self, state, dt):
+        update_startup(state)
+
+    def draw(self, screen, state):
+        draw_startup(screen, state)
+
+    def next_deadline(self, state, now):
+        return startup_deadline(state, now)
+
+class FaceMode(Mode):
+    name = "FACE"
+    depends = ("messages",) # Unread badge
+
+    def update(self, state, dt):
+        # Blink, idle behaviors and the random GIF trigger are face timers
+        update_face(state)
+
+    def draw(self, screen, state):
+        draw_face(screen, state)
+
+    def handle_touch(self, state, pos):
+        # Tap face to go to menu
+        state["current_mode"] = "MENU"
+
+    def next_deadline(self, state, now):
+        return face_deadline(state, now)
+
+class MenuMode(Mode):
+    name = "MENU"
+    taps_on_release = True # Swipes turn pages
+
+    def draw(self, screen, state):
+        draw_menu(screen, state)
+
+    def layout(self, state):
+        return menu_layout(state)
+
+    def handle_touch(self, state, pos):
+        action = handle_menu_touch(state, pos)
+        if action:
+            handle_menu_action(state, action)
+
+    def handle_gesture(self, state, gesture):
+        if gesture.gesture == "swipe" and gesture.direction in ("left", "right"):
+            return turn_menu_page(state, 1 if gesture.direction == "left" else -1)
+        return False
+
+class ClockMode(Mode):
+    name = "CLOCK"
+
+    def update(self, state, dt):
+        # Ensure clock updates every second (the displayed wall-clock second)
+        second = int(time.time())
+        if second != state.get("last_clock_update", 0):
+            state["last_clock_update"] = second
+            state["needs_redraw"] = True
+
+    def draw(self, screen, state):
+        draw_clock(screen, state)
+
+    def handle_touch(self, state, pos):
+        state["current_mode"] = "MENU"
+
+    def next_deadline(self, state, now):
+        return clock_deadline(state, now)
+
+for _mode in (StartupMode(), FaceMode(), MenuMode(), ClockMode()):
+    register(_mode)
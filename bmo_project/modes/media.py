@@ -1,11 +1,16 @@
 import pygame
-import time
 import os
 import sys
 from PIL import Image
 from .. import config
+from .. import display
+from .. import clock
+from .. import pixels
+from . import Mode, register
+from .. import watchdog
 
 # --- SLIDESHOW ---
+@watchdog.timed
 def start_slideshow(state, subdir):
     # subdir is 'default' or 'perso'
     path = os.path.join(config.NEXTCLOUD_PATH, subdir, "Photos")
@@ -27,17 +32,18 @@ def start_slideshow(state, subdir):
         state["slideshow"]["images"] = ["PLACEHOLDER_EMPTY"]
         
     state["slideshow"]["index"] = 0
-    state["slideshow"]["last_switch"] = 0
+    state["slideshow"]["last_switch"] = float("-inf") # First image right away
     state["slideshow"]["current_surface"] = None
-    state["slideshow"]["last_touch_time"] = 0
+    state["slideshow"]["last_touch_time"] = float("-inf") # No hint until touched
     
     state["current_mode"] = "SLIDESHOW"
 
+@watchdog.timed
 def update_slideshow(state):
     # Determine slide
     if "slideshow" not in state: return
     
-    now = time.time()
+    now = clock.now()
     if now - state["slideshow"].get("last_switch", 0) > 5.0:
         state["slideshow"]["last_switch"] = now
         
@@ -62,23 +68,13 @@ def update_slideshow(state):
             # Resize with PIL (high quality)
             pil_img = pil_img.resize(new_size, Image.Resampling.BILINEAR)
             
-            # Convert to Pygame
-            mode = pil_img.mode
-            size = pil_img.size
-            data = pil_img.tobytes()
-            pygame_img = pygame.image.fromstring(data, size, mode)
-            
-            # OPTIMIZATION: Convert immediately
-            if config.SURFACE_DEPTH == 16:
-                converted = pygame.Surface((config.WIDTH, config.HEIGHT), depth=16, masks=config.SURFACE_MASKS)
-            else:
-                converted = pygame.Surface((config.WIDTH, config.HEIGHT))
-                
+            # OPTIMIZATION: Convert straight into the centered area of a panel-format slide
+            converted = display.native_surface((config.WIDTH, config.HEIGHT))
             converted.fill(config.BLACK)
             
             x = (config.WIDTH - new_size[0]) // 2
             y = (config.HEIGHT - new_size[1]) // 2
-            converted.blit(pygame_img, (x, y))
+            pixels.image_to_surface(pil_img, converted.subsurface((x, y, new_size[0], new_size[1])))
             
             state["slideshow"]["current_surface"] = converted
             state["needs_redraw"] = True
@@ -87,6 +83,15 @@ def update_slideshow(state):
             print(f"Slideshow error: {e}")
             state["slideshow"]["index"] = (state["slideshow"].get("index", 0) + 1) % len(imgs)
 
+def slideshow_deadline(state, now):
+    """Next slide, or the moment navigation hints disappear"""
+    if "slideshow" not in state: return None
+    deadlines = [state["slideshow"].get("last_switch", 0) + 5.0]
+    hint_end = state["slideshow"].get("last_touch_time", 0) + 1.0
+    if hint_end > now:
+        deadlines.append(hint_end)
+    return min(deadlines)
+
 def draw_slideshow(screen, state):
     if not state.get("slideshow"): return
     
@@ -101,7 +106,7 @@ def draw_slideshow(screen, state):
         screen.blit(surf, (0, 0))
     
     # Navigation hints (show for 1 second after touch)
-    if time.time() - state["slideshow"].get("last_touch_time", 0) < 1.0:
+    if clock.now() - state["slideshow"].get("last_touch_time", 0) < 1.0:
         hint_left = config.FONT_SMALL.render("<", True, config.WHITE)
         hint_right = config.FONT_SMALL.render(">", True, config.WHITE)
         screen.blit(hint_left, (10, config.HEIGHT - 30))
@@ -110,6 +115,7 @@ def draw_slideshow(screen, state):
 # --- GIF PLAYER ---
 import random
 
+@watchdog.timed
 def start_gif_player(state, subdir):
     path = os.path.join(config.NEXTCLOUD_PATH, subdir, "Photos", "GIFs")
     print(f"🎞️ Starting GIF Player. Searching in: {path}")
@@ -139,12 +145,13 @@ def start_gif_player(state, subdir):
 
     random.shuffle(state["gif_player"]["gifs"])
     state["gif_player"]["current_gif_index"] = 0
-    state["gif_player"]["gif_switch_time"] = time.time()
+    state["gif_player"]["gif_switch_time"] = clock.now()
     state["gif_player"]["next_frames"] = [] # Clear preload
     
     load_next_gif(state)
     state["current_mode"] = "GIF_PLAYER"
 
+@watchdog.timed
 def _load_gif_frames(gif_path):
     print(f"🎞️ Loading GIF: {gif_path}")
     frames = []
@@ -167,18 +174,8 @@ def _load_gif_frames(gif_path):
                 new_size = (int(img_w * scale), int(img_h * scale))
                 frame = frame.resize(new_size, Image.Resampling.NEAREST) # Nearest neighbor is fastest and retro for GIFs
                 
-                mode = frame.mode
-                size = frame.size
-                data = frame.tobytes()
-                pygame_frame = pygame.image.fromstring(data, size, mode)
-                
-                # OPTIMIZATION: Convert immediately
-                if config.SURFACE_DEPTH == 16:
-                   surf = pygame.Surface((new_size[0], new_size[1]), depth=16, masks=config.SURFACE_MASKS)
-                   surf.blit(pygame_frame, (0,0))
-                   frames.append(surf)
-                else:
-                   frames.append(pygame_frame.convert())
+                # OPTIMIZATION: Convert immediately (no dithering, it would shimmer between frames)
+                frames.append(pixels.image_to_surface(frame, dither=False))
                    
                 frame_num += 1
             except EOFError:
@@ -203,7 +200,7 @@ def load_next_gif(state):
         state["gif_player"]["frames"] = frames
         state["gif_player"]["frame_duration"] = duration
         state["gif_player"]["frame_index"] = 0
-        state["gif_player"]["last_frame_time"] = time.time()
+        state["gif_player"]["last_frame_time"] = clock.now()
     
     preload_next_gif(state)
 
@@ -221,21 +218,35 @@ def update_gif(state):
     if "gif_player" not in state: return
     
     # Switch GIF every 15s
-    if time.time() - state["gif_player"].get("gif_switch_time", 0) > 15.0:
+    if clock.now() - state["gif_player"].get("gif_switch_time", 0) > 15.0:
         gifs = state["gif_player"].get("gifs")
         if gifs:
             state["gif_player"]["current_gif_index"] = (state["gif_player"]["current_gif_index"] + 1) % len(gifs)
-            state["gif_player"]["gif_switch_time"] = time.time()
+            state["gif_player"]["gif_switch_time"] = clock.now()
             load_next_gif(state)
             
     # Animate
-    if time.time() - state["gif_player"].get("last_frame_time", 0) > state["gif_player"].get("frame_duration", 0.1):
-        state["gif_player"]["last_frame_time"] = time.time()
+    if clock.now() - state["gif_player"].get("last_frame_time", 0) > state["gif_player"].get("frame_duration", 0.1):
+        state["gif_player"]["last_frame_time"] = clock.now()
         frames = state["gif_player"].get("frames")
         if frames:
             state["gif_player"]["frame_index"] = (state["gif_player"]["frame_index"] + 1) % len(frames)
             state["needs_redraw"] = True
 
+def gif_deadline(state, now):
+    """Next GIF frame, next GIF switch, hint timeout or end of a random GIF"""
+    player = state.get("gif_player")
+    if not player: return None
+    deadlines = [player.get("last_frame_time", 0) + player.get("frame_duration", 0.1)]
+    if state["current_mode"] == "RANDOM_GIF":
+        deadlines.append(state["random_gif"].get("start_time", 0) + state["random_gif"].get("duration", 0))
+    else:
+        deadlines.append(player.get("gif_switch_time", 0) + 15.0)
+    hint_end = player.get("last_touch_time", 0) + 1.0
+    if hint_end > now:
+        deadlines.append(hint_end)
+    return min(deadlines)
+
 def draw_gif(screen, state):
     if not state.get("gif_player"): return
     screen.fill(config.BLACK)
@@ -253,7 +264,7 @@ def draw_gif(screen, state):
     screen.blit(frame, (x, y))
 
     # Hints
-    if time.time() - state["gif_player"].get("last_touch_time", 0) < 1.0:
+    if clock.now() - state["gif_player"].get("last_touch_time", 0) < 1.0:
         hint_left = config.FONT_SMALL.render("<", True, config.WHITE)
         hint_right = config.FONT_SMALL.render(">", True, config.WHITE)
         screen.blit(hint_left, (10, config.HEIGHT - 30))
@@ -261,35 +272,34 @@ def draw_gif(screen, state):
 
         screen.blit(hint_right, (config.WIDTH - 30, config.HEIGHT - 30))
 
+def step_gif(state, step):
+    """Show the GIF `step` places away in the folder. Returns True if there is one."""
+    gifs = state["gif_player"].get("gifs")
+    if not gifs:
+        return False
+    state["gif_player"]["current_gif_index"] = (state["gif_player"]["current_gif_index"] + step) % len(gifs)
+    state["gif_player"]["gif_switch_time"] = clock.now() # Reset auto-switch timer
+    load_next_gif(state)
+    return True
+
 def handle_gif_touch(state, pos):
     if "gif_player" not in state: return
     
     x, y = pos
     width = config.WIDTH
     
-    state["gif_player"]["last_touch_time"] = time.time()
+    state["gif_player"]["last_touch_time"] = clock.now()
     
     # Navigation
     if x < width // 3:
-        # Prev
-        gifs = state["gif_player"].get("gifs")
-        if gifs:
-            state["gif_player"]["current_gif_index"] = (state["gif_player"]["current_gif_index"] - 1) % len(gifs)
-            state["gif_player"]["gif_switch_time"] = time.time() # Reset auto-switch timer
-            load_next_gif(state)
-            
+        step_gif(state, -1) # Prev
     elif x > 2 * width // 3:
-        # Next
-        gifs = state["gif_player"].get("gifs")
-        if gifs:
-            state["gif_player"]["current_gif_index"] = (state["gif_player"]["current_gif_index"] + 1) % len(gifs)
-            state["gif_player"]["gif_switch_time"] = time.time()
-            load_next_gif(state)
-            
+        step_gif(state, 1) # Next
     else:
         # Center -> Exit
         state["current_mode"] = "MENU"
 
+@watchdog.timed
 def trigger_random_gif(state):
     print("🎲 Triggering Random GIF...")
     # Search in both default and perso
@@ -323,13 +333,13 @@ def trigger_random_gif(state):
     state["gif_player"]["frames"] = frames
     state["gif_player"]["frame_duration"] = duration
     state["gif_player"]["frame_index"] = 0
-    state["gif_player"]["last_frame_time"] = time.time()
+    state["gif_player"]["last_frame_time"] = clock.now()
     
     print(f"🎬 Starting Random GIF Mode with {len(state['gif_player']['frames'])} frames")
     
     state["random_gif"]["active"] = True
     state["random_gif"]["active"] = True
-    state["random_gif"]["start_time"] = time.time()
+    state["random_gif"]["start_time"] = clock.now()
     
     # Calculate total duration of one loop
     gif_duration = len(frames) * duration
@@ -342,3 +352,162 @@ def trigger_random_gif(state):
     
     state["current_mode"] = "RANDOM_GIF"
     sys.stdout.flush()
+
+# --- TEXT VIEWER ---
+def start_text_viewer(state, subdir):
+    # subdir is 'default' or 'perso'
+    path = os.path.join(config.NEXTCLOUD_PATH, subdir, "Textes")
+    files = []
+    if os.path.exists(path):
+        try:
+            files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(('.txt', '.md')))
+        except (OSError, IOError) as e:
+            print(f"Error accessing text path {path}: {e}")
+    print(f"📝 Found {len(files)} texts in {path}")
+
+    state["text_viewer"] = {"files": files, "index": 0, "content": None}
+    _load_text(state)
+    state["current_mode"] = "TEXT"
+
+@watchdog.timed
+def _load_text(state):
+    viewer = state["text_viewer"]
+    if not viewer["files"]:
+        viewer["content"] = "No texts found"
+        return
+    try:
+        with open(viewer["files"][viewer["index"]], 'r', encoding='utf-8', errors='replace') as f:
+            viewer["content"] = f.read(4000)
+    except (OSError, IOError) as e:
+        print(f"Error reading text: {e}")
+        viewer["content"] = "Could not read this text"
+
+def draw_text_viewer(screen, state):
+    screen.fill(config.WHITE)
+    viewer = state.get("text_viewer")
+    if not viewer: return
+
+    # Header (file name)
+    pygame.draw.rect(screen, config.BLACK, (0, 0, config.WIDTH, 40))
+    if viewer["files"]:
+        name = os.path.splitext(os.path.basename(viewer["files"][viewer["index"]]))[0]
+        title = config.FONT_SMALL.render(f"{name} ({viewer['index'] + 1}/{len(viewer['files'])})", True, config.WHITE)
+        screen.blit(title, (config.WIDTH//2 - title.get_width()//2, 10))
+
+    # Word wrap
+    lines = []
+    for p in viewer["content"].split('\n'):
+        line = []
+        for w in p.split(' '):
+            line.append(w)
+            if config.FONT_SMALL.size(' '.join(line))[0] > config.WIDTH - 40:
+                line.pop()
+                lines.append(' '.join(line))
+                line = [w]
+        lines.append(' '.join(line))
+
+    y = 50
+    for l in lines:
+        if y > config.HEIGHT - 50: break
+        surf = config.FONT_SMALL.render(l, True, config.BLACK)
+        screen.blit(surf, (20, y))
+        y += 26
+
+    hint = config.FONT_TINY.render("<  TAP CENTER TO BACK  >", True, config.GRAY)
+    screen.blit(hint, (config.WIDTH//2 - hint.get_width()//2, config.HEIGHT - 20))
+
+def handle_text_touch(state, pos):
+    viewer = state.get("text_viewer")
+    x, y = pos
+    if not viewer or not viewer["files"] or config.WIDTH // 3 <= x <= 2 * config.WIDTH // 3:
+        state["current_mode"] = "MENU"
+        return
+    step = -1 if x < config.WIDTH // 3 else 1
+    viewer["index"] = (viewer["index"] + step) % len(viewer["files"])
+    _load_text(state)
+
+
+# --- MODE REGISTRATION ---
+class SlideshowMode(Mode):
+    name = "SLIDESHOW"
+
+    def update(self, state, dt):
+        update_slideshow(state)
+
+    def draw(self, screen, state):
+        draw_slideshow(screen, state)
+
+    def handle_touch(self, state, pos):
+        # Exit slideshow on tap
+        state["current_mode"] = "MENU"
+
+    def exit(self, state):
+        if state.get("slideshow"):
+            state["slideshow"]["current_surface"] = None
+
+    def next_deadline(self, state, now):
+        return slideshow_deadline(state, now)
+
+def _release_gif_frames(state):
+    if state.get("gif_player"):
+        state["gif_player"]["frames"] = []
+        state["gif_player"]["next_frames"] = []
+
+class GifPlayerMode(Mode):
+    name = "GIF_PLAYER"
+    taps_on_release = True # Swipes change GIF
+
+    def update(self, state, dt):
+        update_gif(state)
+
+    def draw(self, screen, state):
+        draw_gif(screen, state)
+
+    def handle_touch(self, state, pos):
+        handle_gif_touch(state, pos)
+
+    def handle_gesture(self, state, gesture):
+        if gesture.gesture == "swipe" and gesture.direction in ("left", "right") and "gif_player" in state:
+            state["gif_player"]["last_touch_time"] = clock.now()
+            return step_gif(state, 1 if gesture.direction == "left" else -1)
+        return False
+
+    def exit(self, state):
+        _release_gif_frames(state)
+
+    def next_deadline(self, state, now):
+        return gif_deadline(state, now)
+
+class RandomGifMode(Mode):
+    name = "RANDOM_GIF"
+
+    def update(self, state, dt):
+        update_gif(state)
+        # Check Duration
+        if clock.now() - state["random_gif"]["start_time"] > state["random_gif"]["duration"]:
+            state["current_mode"] = "FACE"
+
+    def draw(self, screen, state):
+        draw_gif(screen, state)
+
+    def exit(self, state):
+        state["random_gif"]["active"] = False
+        _release_gif_frames(state)
+
+    def next_deadline(self, state, now):
+        return gif_deadline(state, now)
+
+class TextMode(Mode):
+    name = "TEXT"
+
+    def draw(self, screen, state):
+        draw_text_viewer(screen, state)
+
+    def handle_touch(self, state, pos):
+        handle_text_touch(state, pos)
+
+    def exit(self, state):
+        state.pop("text_viewer", None)
+
+for _mode in (SlideshowMode(), GifPlayerMode(), RandomGifMode(), TextMode()):
+    register(_mode)
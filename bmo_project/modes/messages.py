@@ -1,9 +1,13 @@
 import pygame
 import time
-import threading
 from .. import config
+from .. import display
+from .. import clock
+from .. import tasks
 from .. import ui_core
 from .. import network
+from .. import layout
+from . import Mode, register
 
 # T9 Key mapping
 T9_KEYS = {
@@ -34,6 +38,21 @@ KEYS_LAYOUT = [
     ("*", "DEL", (85, 255)), ("0", "_", (195, 255)), ("#", "SEND", (305, 255))
 ]
 
+def t9_layout():
+    """The keys (KEYS_LAYOUT) and the cancel button, laid out once"""
+    def build():
+        lay = layout.Layout()
+        for k, label, (kx, ky) in KEYS_LAYOUT:
+            lay.add((kx, ky, 100, 50), k, label=label, radius=5)
+        # Cancel X (Top Right), touchable in the whole corner
+        lay.add((430, 10, 30, 30), "CANCEL", hit=(440, 0, config.WIDTH - 440, 70), radius=5)
+        return lay
+    return layout.get(("t9",), build)
+
+def _on_sent(ok, error):
+    if not ok:
+        print("⚠️ Message was not sent")
+
 class T9Keyboard:
     def __init__(self):
         self.text = ""
@@ -45,7 +64,7 @@ class T9Keyboard:
         self.recipient = "" # Target bot name (e.g. "AMO" or "BMO")
 
     def handle_input(self, key_val):
-        now = time.time()
+        now = clock.now()
         
         # Check if we are cycling the same key
         if key_val == self.last_key and (now - self.last_press_time < 1.0):
@@ -68,18 +87,12 @@ class T9Keyboard:
 
     def handle_touch(self, pos):
         # Map touch to keys
-        x, y = pos
-        # New key size
-        w, h = 100, 50
-        
-        for k, label, (kx, ky) in KEYS_LAYOUT:
-            if kx <= x <= kx + w and ky <= y <= ky + h:
-                return self.process_key(k)
-        
-        # Handle CANCEL/EXIT if touching top left (outside input)?
-        # Let's keep specific exit logic in main handler for now, or return trigger here
-        if y < 70 and x > 440: # Top right corner cancel
-             return "CANCEL"
+        w = t9_layout().hit(pos)
+        if w is None:
+            return None
+        if w.action == "CANCEL":
+            return "CANCEL"
+        return self.process_key(w.action)
 
     def process_key(self, k):
         if k in "1234567890":
@@ -92,7 +105,7 @@ class T9Keyboard:
                 "0": " 0"
             }
             fake_key = ord(k) # Use ascii as key
-            now = time.time()
+            now = clock.now()
             
             if fake_key == self.last_key and (now - self.last_press_time < 0.8):
                 self.cycle_index += 1
@@ -110,21 +123,24 @@ class T9Keyboard:
             self.text = self.text[:-1]
         elif k == "#": # SEND
             if self.text:
-                network.send_message(self.recipient, self.text.strip())
+                # Sent by the worker pool: the inbox shows a spinner meanwhile
+                tasks.submit("send", network.send_message, self.recipient, self.text.strip(), on_done=_on_sent)
                 self.text = "" # Clear after send
                 return "SENT"
 
-    def draw(self, screen):
+    def draw(self, screen, state):
+        lay = t9_layout()
         # Cancel X button (Top Right)
-        pygame.draw.rect(screen, config.RED, (430, 10, 30, 30), border_radius=5)
+        cancel = lay.widgets[-1]
+        pygame.draw.rect(screen, config.RED, cancel.rect, border_radius=5)
         lbl_x = config.FONT_SMALL.render("X", True, config.WHITE)
-        screen.blit(lbl_x, (445 - lbl_x.get_width()//2, 25 - lbl_x.get_height()//2))
+        screen.blit(lbl_x, (cancel.rect.centerx - lbl_x.get_width()//2, cancel.rect.centery - lbl_x.get_height()//2))
         
         font = config.FONT_MEDIUM
         if font:
             # Render text - Clip to fit
             # Check global state for cursor (managed in main.py)
-            show_cursor = self.state.get("cursor_visible", True)
+            show_cursor = state.get("cursor_visible", True)
             display_text = self.text + ("|" if show_cursor else "")
             
             # Text area width is 430 - 20 = 410 (minus button space)
@@ -133,25 +149,57 @@ class T9Keyboard:
                 
             txt_surf = font.render(display_text, True, (0, 0, 0))
             screen.blit(txt_surf, (20, 20))
+            # Typing and cursor blink only touch the input line
+            display.mark_dirty((0, 20, config.WIDTH, txt_surf.get_height()))
             
         # Draw Keys
-        for k, label, (x, y) in KEYS_LAYOUT:
+        for w in lay.widgets[:-1]:
+            k = w.action
             color = (200, 200, 200)
             if k == "#": color = (100, 200, 100) # Green for Send
             if k == "*": color = (200, 100, 100) # Red for Del
             
             # Key Rect
-            pygame.draw.rect(screen, color, (x, y, 100, 50), border_radius=5)
-            pygame.draw.rect(screen, (0, 0, 0), (x, y, 100, 50), 2, border_radius=5)
+            pygame.draw.rect(screen, color, w.rect, border_radius=5)
+            pygame.draw.rect(screen, (0, 0, 0), w.rect, 2, border_radius=5)
             
             # Label
-            lbl = config.FONT_SMALL.render(f"{k} {label}", True, (0, 0, 0))
-            screen.blit(lbl, (x + 50 - lbl.get_width()//2, y + 25 - lbl.get_height()//2))
+            lbl = config.FONT_SMALL.render(f"{k} {w.data['label']}", True, (0, 0, 0))
+            screen.blit(lbl, (w.rect.centerx - lbl.get_width()//2, w.rect.centery - lbl.get_height()//2))
+
+
+def inbox_layout(state):
+    """Buttons and message rows of the inbox page on screen"""
+    msgs = state["messages"]["list"]
+    items_per_page = 4
+    page = state.get("menu_page", 0)
+    visible = len(msgs[page * items_per_page:(page + 1) * items_per_page])
+    has_next = len(msgs) > (page + 1) * items_per_page
+    return layout.get(("inbox", visible, page > 0, has_next),
+                      lambda: _build_inbox_layout(visible, page > 0, has_next))
+
+def _build_inbox_layout(visible, has_prev, has_next):
+    lay = layout.Layout()
+    # Header buttons, touchable up to the top edge
+    lay.add((10, 10, 80, 30), "WRITE", hit=(0, 0, 90, 40), color=config.GREEN, radius=5)
+    lay.add((config.WIDTH - 90, 10, 80, 30), "FETCH", hit=(config.WIDTH - 90, 0, 90, 40), color=config.BLUE, radius=5)
 
+    # Message rows: the whole width of the row reacts
+    for i in range(visible):
+        y = 60 + i * 55
+        lay.add((20, y, 440, 50), f"OPEN:{i}", hit=(0, y, config.WIDTH, 55), radius=10)
+
+    # Bottom bar
+    if has_prev:
+        lay.add((20, 280, 60, 20), "PAGE:-1", hit=(0, 280, 100, 40), label="< PREV")
+    if has_next:
+        lay.add((config.WIDTH - 80, 280, 60, 20), "PAGE:1", hit=(config.WIDTH - 100, 280, 100, 40), label="NEXT >")
+    lay.add((config.WIDTH//2 - 40, 280, 80, 30), "EXIT", hit=(config.WIDTH//2 - 40, 280, 81, 40), color=config.GRAY, radius=5)
+    return lay
 
 def draw_messages(screen, state):
     if state.get("composing", False):
-        res = state["keyboard"].draw(screen)
+        res = state["keyboard"].draw(screen, state)
         return
 
     # Original BMO Style
@@ -162,15 +210,17 @@ def draw_messages(screen, state):
     title = config.FONT_MEDIUM.render("BMO INBOX", True, config.WHITE)
     screen.blit(title, (config.WIDTH//2 - title.get_width()//2, 10))
     
-    # FETCH Button (Top Right) - RESTORED
-    pygame.draw.rect(screen, config.BLUE, (config.WIDTH - 90, 10, 80, 30), border_radius=5)
-    lbl = config.FONT_TINY.render("FETCH", True, config.WHITE)
-    screen.blit(lbl, (config.WIDTH - 50 - lbl.get_width()//2, 17))
-
-    # WRITE/COMPOSE Button (Top Left) - NEW LOCATION
-    pygame.draw.rect(screen, config.GREEN, (10, 10, 80, 30), border_radius=5)
-    lbl = config.FONT_TINY.render("WRITE", True, config.WHITE)
-    screen.blit(lbl, (50 - lbl.get_width()//2, 17))
+    # WRITE (Top Left), FETCH (Top Right) and EXIT (Center Bottom) Buttons
+    lay = inbox_layout(state)
+    for w in lay.widgets:
+        if w.action in ("WRITE", "FETCH", "EXIT"):
+            pygame.draw.rect(screen, w.data["color"], w.rect, border_radius=5)
+            lbl = config.FONT_TINY.render(w.action, True, config.WHITE)
+            screen.blit(lbl, (w.rect.centerx - lbl.get_width()//2, w.rect.y + 7))
+
+    # Sync / send in progress
+    if tasks.pending("sync", "send"):
+        ui_core.draw_spinner(screen, (config.WIDTH - 110, 25), clock.now())
     
     msgs = state["messages"]["list"]
     if not msgs:
@@ -181,11 +231,12 @@ def draw_messages(screen, state):
         items_per_page = 4
         page = state.get("menu_page", 0)
         start_idx = page * items_per_page
-        visible = msgs[start_idx:start_idx + items_per_page]
+        rows = [w for w in lay.widgets if w.action.startswith("OPEN:")]
         
-        for i, m in enumerate(visible):
-            y = 60 + i * 55
-            rect = (20, y, 440, 50)
+        for w in rows:
+            m = msgs[start_idx + int(w.action.split(":")[1])]
+            rect = w.rect
+            y = rect.y
             pygame.draw.rect(screen, config.WHITE, rect, border_radius=10)
             pygame.draw.rect(screen, config.BLACK, rect, 2, border_radius=10)
             
@@ -209,21 +260,21 @@ def draw_messages(screen, state):
                  pygame.draw.circle(screen, config.RED, (450, y+25), 5)
 
         # Navigation
-        nav_y = 280
-        if page > 0:
-            lbl = config.FONT_TINY.render("< PREV", True, config.BLACK)
-            screen.blit(lbl, (20, nav_y))
-        if len(msgs) > (page + 1) * items_per_page:
-            lbl = config.FONT_TINY.render("NEXT >", True, config.BLACK)
-            screen.blit(lbl, (config.WIDTH - 80, nav_y))
-
-    # EXIT Button (Center Bottom)
-    pygame.draw.rect(screen, config.GRAY, (config.WIDTH//2 - 40, 280, 80, 30), border_radius=5)
-    lbl = config.FONT_TINY.render("EXIT", True, config.WHITE)
-    screen.blit(lbl, (config.WIDTH//2 - lbl.get_width()//2, 287))
+        for w in lay.widgets:
+            if w.action.startswith("PAGE:"):
+                lbl = config.FONT_TINY.render(w.data["label"], True, config.BLACK)
+                screen.blit(lbl, w.rect.topleft)
+
+def turn_messages_page(state, step):
+    """Move `step` pages in the message list (swipe paging). Returns True if the page changed."""
+    total_pages = max(1, (len(state["messages"]["list"]) + 3) // 4)
+    page = max(0, min(total_pages - 1, state.get("menu_page", 0) + step))
+    if page == state.get("menu_page", 0):
+        return False
+    state["menu_page"] = page
+    return True
 
 def handle_touch(state, pos):
-    x, y = pos
     if state.get("composing", False):
         if state.get("keyboard"):
             res = state["keyboard"].handle_touch(pos)
@@ -232,63 +283,48 @@ def handle_touch(state, pos):
         return
 
     # List View Touches
-    # FETCH (Top Right)
-    if x > config.WIDTH - 90 and y < 40:
-        network.sync_messages(state)
+    w = inbox_layout(state).hit(pos)
+    if w is None:
         return
 
-    # WRITE (Top Left)
-    if x < 90 and y < 40:
+    if w.action == "FETCH":
+        tasks.submit("sync", network.sync_messages, state, unique=True)
+
+    elif w.action == "WRITE":
         state["composing"] = True
         state["keyboard"] = T9Keyboard()
         # Auto-recipient based on identity
         state["keyboard"].recipient = "BMO" if config.IDENTITY == "AMO" else "AMO"
-        return
 
-    # EXIT (Bottom Center)
-    if config.WIDTH//2 - 40 <= x <= config.WIDTH//2 + 40 and y > 280:
+    elif w.action == "EXIT":
         state["current_mode"] = "MENU" # Go back to menu
-        return
 
-    # PREV/NEXT
-    page = state.get("menu_page", 0)
-    items_per_page = 4
-    msgs = state["messages"]["list"]
-    
-    if y > 280:
-        if x < 100 and page > 0:
-            state["menu_page"] = page - 1
-        elif x > config.WIDTH - 100 and len(msgs) > (page + 1) * items_per_page:
-            state["menu_page"] = page + 1
-        return
+    elif w.action.startswith("PAGE:"):
+        turn_messages_page(state, int(w.action.split(":")[1]))
 
-    # Message Click
-    # Rows start at 60, height 55 (50 + 5 gap?)
-    # y = 60 + i * 55
-    # i = (y - 60) // 55
-    # Message Click
-    if 60 <= y <= 280:
-        idx = (y - 60) // 55
-        start_idx = page * items_per_page
-        real_idx = start_idx + idx
-        if 0 <= idx < 4 and real_idx < len(msgs):
+    elif w.action.startswith("OPEN:"):
+        msgs = state["messages"]["list"]
+        real_idx = state.get("menu_page", 0) * 4 + int(w.action.split(":")[1])
+        if real_idx < len(msgs):
             # View Message
             msg = msgs[real_idx]
             msg["read"] = True # Mark read
             
             # Send Read Receipt
-            threading.Thread(target=network.send_read_receipt, args=(msg["id"],), daemon=True).start()
+            tasks.submit("receipt", network.send_read_receipt, msg["id"])
             
             # Init Typewriter View (Boot Style)
             state["message_view"] = {
                 "msg": msg,
-                "start_time": time.time(),
+                "start_time": clock.now(),
                 "char_delay": 0.05, # Fast typing
                 "scroll_y": 0,
                 "char_index": 0
             }
             state["current_mode"] = "MESSAGE_VIEW"
 
+TEXT_BOTTOM = config.HEIGHT - 60 # Message text stays above the BACK / REPLY buttons
+
 def draw_message_view(screen, state):
     screen.fill(config.BLACK) # Boot style: Black BG
     
@@ -306,7 +342,7 @@ def draw_message_view(screen, state):
     display_text = f"FROM: {sender}\nTIME: {time_str}\n\n{full_content}"
     
     # Calculate visible chars based on elapsed time (Boot Logic)
-    elapsed = time.time() - state["message_view"]["start_time"]
+    elapsed = clock.now() - state["message_view"]["start_time"]
     target_chars = int(elapsed / state["message_view"]["char_delay"])
     
     if target_chars > len(display_text):
@@ -317,6 +353,7 @@ def draw_message_view(screen, state):
              state["message_view"]["char_index"] = target_chars
              state["needs_redraw"] = True
     
+    state["message_view"]["length"] = len(display_text)
     visible_text = display_text[:target_chars]
     
     # Word Wrap & Render
@@ -342,16 +379,24 @@ def draw_message_view(screen, state):
     
     # Draw Lines (Centered Vertically if short, or top down if long?)
     # Boot style was centered. Let's stick to top-down for readability of long messages
-    y = 40
+    # Long messages scroll above the buttons: the view follows the typing until dragged
+    view = state["message_view"]
+    view["max_scroll"] = max(0, 40 + len(lines) * 35 - TEXT_BOTTOM)
+    if not view.get("dragged"):
+        view["scroll_y"] = view["max_scroll"]
+    view["scroll_y"] = min(view.get("scroll_y", 0), view["max_scroll"])
+    
+    screen.set_clip((0, 0, config.WIDTH, TEXT_BOTTOM))
+    y = 40 - view["scroll_y"]
     for l in lines:
-        if l.strip():
+        if l.strip() and -35 < y < TEXT_BOTTOM:
             surf = config.FONT_MEDIUM.render(l, False, config.WHITE)
             screen.blit(surf, (20, y))
         y += 35
         
     # Blinking Cursor at end
     if target_chars < len(display_text):
-        if int(time.time() * 2) % 2 == 0:
+        if int(clock.now() * 2) % 2 == 0:
             cursor = config.FONT_MEDIUM.render("_", False, config.WHITE)
             # Find position of last char
             last_line = lines[-1] if lines else ""
@@ -360,6 +405,7 @@ def draw_message_view(screen, state):
             cy = y - 35
             screen.blit(cursor, (cx, cy))
             state["needs_redraw"] = True
+    screen.set_clip(None)
             
     # Draw Buttons only when finished typing? Or always?
     # Boot style implies automated, but this is interactive.
@@ -375,6 +421,40 @@ def draw_message_view(screen, state):
     lbl = config.FONT_SMALL.render("REPLY", True, config.WHITE)
     screen.blit(lbl, (config.WIDTH - 60 - lbl.get_width()//2, config.HEIGHT - 40))
 
+def scroll_message_view(state, gesture):
+    """Drag the message text. Returns True if it moved."""
+    view = state.get("message_view")
+    if not view or gesture.gesture != "drag":
+        return False
+    if gesture.phase == "start":
+        view["drag_origin"] = view.get("scroll_y", 0)
+        view["dragged"] = True
+    if gesture.phase == "end" or "drag_origin" not in view:
+        return False
+    scroll_y = max(0, min(view.get("max_scroll", 0), view["drag_origin"] - gesture.dy))
+    if scroll_y == view.get("scroll_y", 0):
+        return False
+    view["scroll_y"] = scroll_y
+    return True
+
+def messages_deadline(state, now):
+    """Only the compose cursor (every half second) and the sync spinner animate"""
+    if state.get("composing"):
+        return (int(now * 2) + 1) / 2.0
+    if tasks.pending("sync", "send"):
+        return (int(now * 16) + 1) / 16.0
+    return None
+
+def message_view_deadline(state, now):
+    """Next typed character / cursor blink while the message is being revealed"""
+    view = state.get("message_view")
+    if not view or not view.get("msg"):
+        return now
+    if view.get("char_index", 0) >= view.get("length", float("inf")):
+        return None
+    next_char = view["start_time"] + (view.get("char_index", 0) + 1) * view["char_delay"]
+    return min(next_char, (int(now * 2) + 1) / 2.0)
+
 def handle_message_view_touch(state, pos):
     x, y = pos
     
@@ -394,5 +474,71 @@ def handle_message_view_touch(state, pos):
     # Tap elsewhere to speed up?
     if y < config.HEIGHT - 60:
          # Instant finish
-         state["message_view"]["start_time"] = 0 # Forces large elapsed
+         state["message_view"]["start_time"] = clock.now() - 1e6 # Forces large elapsed
          state["needs_redraw"] = True
+
+
+# --- MODE REGISTRATION ---
+class MessagesMode(Mode):
+    name = "MESSAGES"
+    depends = ("messages",)
+    taps_on_release = True # Swipes turn pages
+
+    def update(self, state, dt):
+        # --- CURSOR BLINK ---
+        if state.get("composing"):
+            # Force redraw every 0.5s for cursor
+            visible = int(clock.now() * 2) % 2 == 0
+            if visible != state.get("cursor_visible"):
+                state["cursor_visible"] = visible
+                state["needs_redraw"] = True
+        elif tasks.pending("sync", "send"):
+            # Spinner step
+            phase = int(clock.now() * 16)
+            if phase != state.get("spinner_phase"):
+                state["spinner_phase"] = phase
+                state["needs_redraw"] = True
+
+    def draw(self, screen, state):
+        draw_messages(screen, state)
+
+    def handle_touch(self, state, pos):
+        handle_touch(state, pos)
+
+    def layout(self, state):
+        return t9_layout() if state.get("composing") else inbox_layout(state)
+
+    def handle_gesture(self, state, gesture):
+        if state.get("composing") or gesture.gesture != "swipe":
+            return False
+        if gesture.direction in ("up", "left"):
+            return turn_messages_page(state, 1)
+        if gesture.direction in ("down", "right"):
+            return turn_messages_page(state, -1)
+        return False
+
+    def exit(self, state):
+        state["composing"] = False
+        state["keyboard"] = None
+
+    def next_deadline(self, state, now):
+        return messages_deadline(state, now)
+
+class MessageViewMode(Mode):
+    name = "MESSAGE_VIEW"
+    depends = ("messages",)
+
+    def draw(self, screen, state):
+        draw_message_view(screen, state)
+
+    def handle_touch(self, state, pos):
+        handle_message_view_touch(state, pos)
+
+    def handle_gesture(self, state, gesture):
+        return scroll_message_view(state, gesture)
+
+    def next_deadline(self, state, now):
+        return message_view_deadline(state, now)
+
+for _mode in (MessagesMode(), MessageViewMode()):
+    register(_mode)
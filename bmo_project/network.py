@@ -8,6 +8,7 @@ import sys
 import threading
 import urllib.error
 from . import config
+from . import tasks
 
 def get_auth_headers():
     """Return Basic Auth headers based on identity"""
@@ -39,25 +40,31 @@ def sync_messages(state):
                 # Server returns {"messages": [...]}
                 new_msgs = data.get("messages", [])
                 
-                existing_ids = {m["id"] for m in state["messages"]["list"]}
-                added = False
-                for m in new_msgs:
-                    if m["id"] not in existing_ids:
-                        state["messages"]["list"].append(m)
-                        if not m.get("read", False):
-                            state["messages"]["unread"] = True
-                        added = True
-                    else:
-                        # Update read status if changed
-                        for local_m in state["messages"]["list"]:
-                            if local_m["id"] == m["id"]:
-                                if m.get("read", False) and not local_m.get("read", False):
-                                    local_m["read"] = True
+                # Applied under the state lock: never in the middle of a frame
+                snapshot = None
+                with state.mutate("messages") as messages:
+                    existing_ids = {m["id"] for m in messages["list"]}
+                    added = False
+                    for m in new_msgs:
+                        if m["id"] not in existing_ids:
+                            messages["list"].append(m)
+                            if not m.get("read", False):
+                                messages["unread"] = True
+                            added = True
+                        else:
+                            # Update read status if changed
+                            for local_m in messages["list"]:
+                                if local_m["id"] == m["id"]:
+                                    if m.get("read", False) and not local_m.get("read", False):
+                                        local_m["read"] = True
 
+                    if added:
+                        messages["list"].sort(key=lambda x: x.get("timestamp", 0), reverse=True)
+                        snapshot = [dict(m) for m in messages["list"]]
+                if snapshot is not None:
+                    # Written outside the lock: SD card I/O would stall the frame
+                    save_messages(snapshot)
                 if added:
-                    state["messages"]["list"].sort(key=lambda x: x.get("timestamp", 0), reverse=True)
-                    save_messages(state)
-                    state["needs_redraw"] = True
                     print(f"📩 Received {len(new_msgs)} messages!")
                     sys.stdout.flush()
                 return True
@@ -149,9 +156,9 @@ def send_message(recipient, content):
         return False
 
 def fetch_remote_messages(state):
-    """Background thread for periodic fetch"""
+    """Background thread for periodic fetch (the sync itself runs on the worker pool)"""
     while True:
-        sync_messages(state)
+        tasks.submit("sync", sync_messages, state, unique=True)
         time.sleep(60)
 
 def load_messages(state):
@@ -164,10 +171,10 @@ def load_messages(state):
         except Exception as e:
             print(f"Error loading messages: {e}")
 
-def save_messages(state):
-    """Save messages to local storage"""
+def save_messages(msgs):
+    """Save a message list to local storage"""
     try:
         with open(config.MESSAGES_FILE, 'w') as f:
-            json.dump({"messages": state["messages"]["list"]}, f)
+            json.dump({"messages": msgs}, f)
     except Exception as e:
         print(f"Error saving messages: {e}")
@@ -0,0 +1,62 @@
+import numpy as np
+
+# --- PANEL PIXEL FORMAT ---
+# numpy-only packing of RGB pixels into the panel's 16-bit layout. No pygame:
+# the legacy PIL script (bmo.py) uses it too. Surface helpers are in pixels.py.
+
+# 4x4 ordered (Bayer) dither thresholds, 0..15
+BAYER_4X4 = np.array([
+    [0, 8, 2, 10],
+    [12, 4, 14, 6],
+    [3, 11, 1, 9],
+    [15, 7, 13, 5]
+], dtype=np.uint16)
+
+class PanelConverter:
+    """
+    Converts 8-bit RGB arrays to a packed 16-bit panel layout (RGB565, BGR565...).
+    All math is done in place in buffers preallocated per image size.
+    """
+    def __init__(self, masks):
+        self.masks = masks
+        # (shift, bits) of the R, G, B fields inside the 16-bit word
+        self.fields = []
+        for mask in masks[:3]:
+            shift = (mask & -mask).bit_length() - 1
+            self.fields.append((shift, bin(mask).count("1")))
+        self._buffers = {}
+
+    def _get_buffers(self, h, w):
+        """Scratch buffers for a given size: output, temp, and tiled dither thresholds per field"""
+        bufs = self._buffers.get((h, w))
+        if bufs is None:
+            tile = np.tile(BAYER_4X4, ((h + 3) // 4, (w + 3) // 4))[:h, :w]
+            # Scale thresholds to the quantization step of each field (8 - bits)
+            dither = [(tile >> (4 - min(4, 8 - bits))).astype(np.uint16) if bits < 8 else None for _, bits in self.fields]
+            bufs = (np.empty((h, w), np.uint16), np.empty((h, w), np.uint16), dither)
+            self._buffers[(h, w)] = bufs
+        return bufs
+
+    def convert(self, rgb, out=None, dither=False):
+        """
+        Pack an (h, w, 3) uint8 array. Result goes to `out` (any (h, w) uint16 view,
+        e.g. a surface's pixels) or to a reused internal buffer.
+        """
+        h, w = rgb.shape[:2]
+        own_out, tmp, dither_tiles = self._get_buffers(h, w)
+        if out is None:
+            out = own_out
+
+        for channel, (shift, bits) in enumerate(self.fields):
+            if dither and dither_tiles[channel] is not None:
+                np.add(rgb[:, :, channel], dither_tiles[channel], out=tmp)
+                np.minimum(tmp, 255, out=tmp)
+                np.right_shift(tmp, 8 - bits, out=tmp)
+            else:
+                np.right_shift(rgb[:, :, channel], 8 - bits, out=tmp)
+            np.left_shift(tmp, shift, out=tmp)
+            if channel == 0:
+                out[...] = tmp
+            else:
+                np.bitwise_or(out, tmp, out=out)
+        return out
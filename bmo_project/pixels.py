@@ -0,0 +1,82 @@
+import time
+import threading
+import numpy as np
+import pygame
+from PIL import Image
+from . import config
+from . import display
+from . import watchdog
+from .panel_format import PanelConverter
+
+_converters = {} # (masks, thread) -> converter: scratch buffers are not shared between threads
+
+def get_converter(masks=None):
+    """Converter for the negotiated panel format (config.SURFACE_MASKS), one per thread"""
+    masks = tuple(masks or config.SURFACE_MASKS or (0xF800, 0x07E0, 0x001F, 0))
+    key = (masks, threading.get_ident())
+    conv = _converters.get(key)
+    if conv is None:
+        conv = PanelConverter(masks)
+        _converters[key] = conv
+    return conv
+
+def to_rgb_array(img):
+    """PIL image or array -> (h, w, 3) uint8 array"""
+    if isinstance(img, Image.Image):
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        return np.asarray(img)
+    return img
+
+@watchdog.timed
+def image_to_surface(img, surface=None, dither=None):
+    """
+    Convert a PIL image or RGB array straight into a panel-format surface.
+    Writes into `surface` (e.g. a subsurface of a slide) when given.
+    """
+    rgb = to_rgb_array(img)
+    h, w = rgb.shape[:2]
+    if dither is None:
+        dither = config.DITHER_IMAGES
+    if surface is None:
+        surface = display.native_surface((w, h))
+
+    if surface.get_bitsize() == 16:
+        # pixels2d is (w, h): transpose to get a writable (h, w) view of the surface
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            get_converter(surface.get_masks()).convert(rgb, out=pixels.T, dither=dither)
+        finally:
+            del pixels # Unlock the surface
+    else:
+        # Desktop / 24-32bpp panels: let SDL blit, the layout is already 8 bits per channel
+        src = pygame.image.frombuffer(np.ascontiguousarray(rgb).tobytes(), (w, h), 'RGB')
+        surface.blit(src, (0, 0))
+    return surface
+
+def rgb_to_panel_bytes(img, dither=False):
+    """PIL image or RGB array -> packed 16-bit bytes for a raw framebuffer write"""
+    return get_converter().convert(to_rgb_array(img), dither=dither).tobytes()
+
+def benchmark(width=config.WIDTH, height=config.HEIGHT, rounds=50):
+    """Print conversion throughput in MPix/s"""
+    rgb = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+    conv = get_converter()
+    results = {}
+    for name, fn in [
+        ("convert", lambda: conv.convert(rgb)),
+        ("convert+dither", lambda: conv.convert(rgb, dither=True)),
+        ("image_to_surface", lambda: image_to_surface(rgb, dither=False)),
+    ]:
+        fn() # Warm up (buffer allocation)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        elapsed = time.perf_counter() - start
+        results[name] = (width * height * rounds) / elapsed / 1e6
+        print(f"{name:>18}: {results[name]:8.1f} MPix/s")
+    return results
+
+if __name__ == "__main__":
+    pygame.init()
+    benchmark()
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from . import config
+from . import display
+
+class LRUCache:
+    """
+    Least-recently-used cache with a memory budget: entries are evicted, oldest
+    first, once the summed sizeof(value) goes over max_bytes.
+    """
+    def __init__(self, max_bytes, sizeof):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict() # key -> (value, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        self.discard(key)
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return value # Never fits, don't flush everything else for it
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, old_size) = self._entries.popitem(last=False)
+            self.bytes -= old_size
+            self.evictions += 1
+        return value
+
+    def discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+# --- SCREEN CACHE ---
+# Static screens are rendered once per distinct set of inputs into an offscreen
+# surface; redrawing with the same inputs is a single blit.
+screens = LRUCache(config.RENDER_CACHE_BYTES, surface_bytes)
+
+def draw_cached(screen, key, draw_fn):
+    """
+    Blit the rendering of draw_fn(surface) for `key` (a tuple of every input that
+    affects the output). draw_fn only runs on a miss.
+    """
+    surface = screens.get(key)
+    if surface is None:
+        surface = display.native_surface(screen.get_size())
+        draw_fn(surface)
+        screens.put(key, surface)
+    screen.blit(surface, (0, 0))
+
+def report():
+    """Log the screen cache counters"""
+    st = screens.stats()
+    print(f"🗃️ Render cache: {st['hits']} hits / {st['misses']} misses ({st['hit_rate']:.0%}), "
+          f"{st['entries']} entries, {st['bytes'] // 1024} KB, {st['evictions']} evictions")
@@ -0,0 +1,108 @@
+import time
+import threading
+import pygame
+from . import config
+from . import clock
+
+# Set by anything that needs the main loop to run now (touch thread, network...)
+_wakeup = threading.Event()
+# (loop, asyncio.Event) when the asyncio runtime is in charge
+_async_wakeup = None
+
+# Posted by wake() on desktop, where the loop blocks in pygame.event.wait
+WAKE_EVENT = pygame.USEREVENT + 1
+
+# Loop wakeups, by cause. wakeups/sec is the idle cost on the Pi (battery, heat).
+stats = {
+    "wakeups": 0,   # Every return from a wait
+    "woken": 0,     # ...by wake() / input
+    "timeouts": 0,  # ...because a deadline was reached
+    "since": time.monotonic()
+}
+_rate = {"count": 0, "time": time.monotonic(), "value": 0.0}
+
+def wake():
+    """Wake the main loop if it is sleeping until its next deadline"""
+    _wakeup.set()
+    if _async_wakeup is not None:
+        loop, event = _async_wakeup
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass # Loop already closed
+    elif config.IS_WINDOWS:
+        try:
+            pygame.event.post(pygame.event.Event(WAKE_EVENT))
+        except pygame.error:
+            pass # Display not initialized yet
+
+def attach_async(loop, event):
+    """Route wake() to the asyncio runtime's render coroutine (None to detach)"""
+    global _async_wakeup
+    _async_wakeup = (loop, event) if loop is not None else None
+
+def count_wakeup(woken):
+    stats["wakeups"] += 1
+    stats["woken" if woken else "timeouts"] += 1
+
+def wakeup_rate():
+    """Loop wakeups per second since the previous call (at most refreshed every 5s)"""
+    now = time.monotonic()
+    elapsed = now - _rate["time"]
+    if elapsed >= 5.0:
+        _rate["value"] = (stats["wakeups"] - _rate["count"]) / elapsed
+        _rate["count"] = stats["wakeups"]
+        _rate["time"] = now
+    return _rate["value"]
+
+def report():
+    """Log the average wakeup rate of the run"""
+    elapsed = max(1e-6, time.monotonic() - stats["since"])
+    print(f"💤 Loop wakeups: {stats['wakeups'] / elapsed:.2f}/s over {elapsed:.0f}s "
+          f"({stats['woken']} woken, {stats['timeouts']} deadlines)")
+
+def frame_timeout(deadline, frame_start, power_save=False):
+    """
+    Seconds to wait before the next frame: until `deadline`, no earlier than the
+    MAX_FPS (POWER_SAVE_FPS in ECO mode) cap. None = nothing scheduled: block until
+    woken (capped by MAX_IDLE_WAIT if set).
+    """
+    now = clock.current()
+    max_fps = config.POWER_SAVE_FPS if power_save else config.MAX_FPS
+    earliest = frame_start + 1.0 / max_fps
+    wake_at = None if deadline is None else max(deadline, earliest)
+    if config.MAX_IDLE_WAIT is not None:
+        cap = now + config.MAX_IDLE_WAIT
+        wake_at = cap if wake_at is None else min(wake_at, cap)
+    return (None if wake_at is None else wake_at - now), earliest
+
+def wait_for_next_frame(deadline, frame_start, power_save=False):
+    """
+    Sleep until `deadline` (None = nothing scheduled) or until woken.
+    The frame rate is capped at MAX_FPS (POWER_SAVE_FPS in ECO mode).
+    Returns the input events received while waiting.
+    """
+    timeout, earliest = frame_timeout(deadline, frame_start, power_save)
+    if timeout is not None and timeout <= 0:
+        return []
+
+    if clock.is_virtual():
+        # Simulation: skip the wait entirely (an idle state just lets time pass)
+        clock.get_clock().advance_to(clock.current() + (timeout if timeout is not None else 1.0))
+        return []
+
+    if config.IS_WINDOWS:
+        # Desktop: input comes from the SDL window, which can block on its own
+        event = pygame.event.wait() if timeout is None else pygame.event.wait(max(1, int(timeout * 1000)))
+        count_wakeup(event.type != pygame.NOEVENT)
+        return [] if event.type in (pygame.NOEVENT, WAKE_EVENT) else [event]
+
+    # The SDL dummy driver only polls in event.wait, block on our own event instead
+    woken = _wakeup.wait(timeout)
+    count_wakeup(woken)
+    if woken:
+        _wakeup.clear()
+        # Never exceed the frame rate cap, even when woken early
+        if clock.current() < earliest and not pygame.event.peek():
+            time.sleep(max(0, earliest - clock.current()))
+    return []
@@ -0,0 +1,52 @@
+import threading
+from contextlib import contextmanager
+from . import scheduler
+
+# Subtrees of the state that change outside the main loop's own logic (state
+# keys holding a dict). Background threads mutate them through StateStore.mutate().
+SUBTREES = ("messages", "weather")
+
+class StateStore(dict):
+    """
+    The shared state. Still a dict (modes read and write state["..."] on the main
+    thread), plus:
+    - `lock`: held by the main loop for a whole frame and by mutate(), so a
+      background thread never changes a subtree in the middle of a frame
+    - per-subtree dirty flags, turned into subscriber calls on the main thread
+      by dispatch()
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+        self._dirty = set()
+        self._subscribers = {}
+
+    @contextmanager
+    def mutate(self, subtree):
+        """
+        Thread-safe change of a subtree:
+            with state.mutate("weather") as weather:
+                weather["temp"] = "12°C"
+        Yields the subtree dict.
+        """
+        if subtree not in SUBTREES:
+            raise KeyError(f"Unknown state subtree {subtree}")
+        with self.lock:
+            yield self[subtree]
+            self._dirty.add(subtree)
+        scheduler.wake()
+
+    def subscribe(self, subtree, callback):
+        """callback(state, subtree) runs on the main thread after the subtree changed"""
+        if subtree not in SUBTREES:
+            raise KeyError(f"Unknown state subtree {subtree}")
+        self._subscribers.setdefault(subtree, []).append(callback)
+
+    def dispatch(self):
+        """Notify subscribers of the subtrees changed since the last call. Returns them."""
+        with self.lock:
+            dirty, self._dirty = self._dirty, set()
+        for subtree in dirty:
+            for callback in self._subscribers.get(subtree, ()):
+                callback(self, subtree)
+        return dirty
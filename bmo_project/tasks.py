@@ -0,0 +1,90 @@
+import queue
+import threading
+from . import config
+from . import scheduler
+
+# --- WORKER POOL ---
+# Blocking work (HTTP calls...) runs on a fixed number of worker threads.
+# Jobs have a name ("sync", "send", "weather", "receipt"...) so the UI can show
+# a spinner while one is pending. Results come back to the main loop through a
+# queue: process_results() runs the on_done callbacks on the main thread.
+
+_work = queue.Queue()
+_results = queue.Queue()
+_pending = {} # job name -> number of submitted jobs whose result was not processed yet
+_lock = threading.Lock()
+_workers = []
+
+def _worker():
+    while True:
+        job = _work.get()
+        if job is None:
+            break
+        name, fn, args, on_done = job
+        try:
+            result, error = fn(*args), None
+        except Exception as e:
+            print(f"⚠️ Job {name} failed: {e}")
+            result, error = None, e
+        _results.put((name, on_done, result, error))
+        scheduler.wake()
+
+def start(workers=None):
+    """Start the worker threads (done on the first submit otherwise)"""
+    with _lock:
+        while len(_workers) < (workers or config.WORKER_THREADS):
+            t = threading.Thread(target=_worker, name=f"bmo-worker-{len(_workers)}", daemon=True)
+            t.start()
+            _workers.append(t)
+
+def submit(name, fn, *args, on_done=None, unique=False):
+    """
+    Queue fn(*args) as a job called `name`. on_done(result, error) runs on the
+    main loop once it is finished. With unique=True, nothing is queued if a job
+    with this name is already pending. Returns True if the job was queued.
+    """
+    with _lock:
+        if unique and _pending.get(name):
+            return False
+        _pending[name] = _pending.get(name, 0) + 1
+    if not _workers:
+        start()
+    _work.put((name, fn, args, on_done))
+    return True
+
+def pending(*names):
+    """True while a job with one of these names (any job if none given) is queued or running"""
+    with _lock:
+        if not names:
+            return any(_pending.values())
+        return any(_pending.get(n) for n in names)
+
+def process_results():
+    """Main loop: run the callbacks of finished jobs. Returns how many finished."""
+    done = 0
+    while True:
+        try:
+            name, on_done, result, error = _results.get_nowait()
+        except queue.Empty:
+            return done
+        with _lock:
+            _pending[name] -= 1
+        if on_done:
+            try:
+                on_done(result, error)
+            except Exception as e:
+                print(f"⚠️ Result handler for {name} failed: {e}")
+        done += 1
+
+def stop():
+    """Drop queued jobs and let the workers exit (running jobs finish on their own)"""
+    while True:
+        try:
+            _work.get_nowait()
+        except queue.Empty:
+            break
+    for _ in _workers:
+        _work.put(None)
+    for t in _workers:
+        t.join(timeout=0.5)
+    _workers.clear()
@@ -0,0 +1,49 @@
+import heapq
+import itertools
+
+class Timers:
+    """
+    Deadline heap for time-based behaviors (blink, idle animations, pop-up face...).
+    Each timer has a key: scheduling a key again replaces its previous deadline.
+    Only due timers are looked at, and next_due() gives the loop its exact wakeup time.
+    """
+    def __init__(self):
+        self._heap = [] # (when, seq, key, callback)
+        self._active = {} # key -> seq of its live heap entry
+        self._seq = itertools.count()
+
+    def schedule(self, key, when, callback):
+        """Run callback(state, now) at `when` (replaces any pending timer with this key)"""
+        seq = next(self._seq)
+        self._active[key] = seq
+        heapq.heappush(self._heap, (when, seq, key, callback))
+
+    def cancel(self, key):
+        # Lazy removal: the stale heap entry is skipped when it surfaces
+        self._active.pop(key, None)
+
+    def pending(self, key):
+        return key in self._active
+
+    def _drop_stale(self):
+        while self._heap and self._active.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def next_due(self):
+        """Earliest pending deadline, or None"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self, state, now):
+        """Fire every timer due at `now`. Timers re-armed by a callback wait for the next call."""
+        due = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            when, seq, key, callback = heapq.heappop(self._heap)
+            if self._active.get(key) == seq:
+                del self._active[key]
+                due.append(callback)
+            self._drop_stale()
+        for callback in due:
+            callback(state, now)
+        return len(due)
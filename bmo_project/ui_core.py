@@ -1,4 +1,5 @@
 import os
+import math
 import pygame
 from PIL import Image, ImageDraw, ImageFont
 from . import config
@@ -55,6 +56,15 @@ def draw_text_centered(screen, text, font, color, y_pos):
     x = (config.WIDTH - lbl.get_width()) // 2
     screen.blit(lbl, (x, y_pos))
 
+def draw_spinner(screen, center, now, color=None, radius=8):
+    """Busy indicator: 8 dots, one highlighted, turning twice per second"""
+    color = color or config.WHITE
+    active = int(now * 16) % 8
+    for i in range(8):
+        a = i * math.pi / 4
+        pos = (int(center[0] + radius * math.cos(a)), int(center[1] + radius * math.sin(a)))
+        pygame.draw.circle(screen, color, pos, 3 if i == active else 2)
+
 def draw_multiline_text(screen, text, font, color, rect):
     """Draw multiline text within a rectangle"""
     # Simple wrap logic could be added here
@@ -3,18 +3,21 @@ import shutil
 import socket
 import subprocess
 import sys
+from . import watchdog
 try:
     from evdev import list_devices, InputDevice
     HAS_EVDEV = True
 except ImportError:
     HAS_EVDEV = False
 
+@watchdog.timed
 def get_cpu_temp():
     try:
         with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
             return int(f.read().strip()) / 1000.0
     except: return 0
 
+@watchdog.timed
 def get_ip_address():
     """Get the IP address of the device"""
     try:
@@ -26,6 +29,7 @@ def get_ip_address():
     except:
         return "Not Connected"
 
+@watchdog.timed
 def get_disk_usage():
     """Get disk usage percentage"""
     try:
@@ -34,6 +38,7 @@ def get_disk_usage():
     except:
         return 0, 0
 
+@watchdog.timed
 def get_ram_usage():
     """Get RAM usage percentage and free GB"""
     try:
@@ -53,6 +58,7 @@ def get_ram_usage():
     except:
         return 0, 0
 
+@watchdog.timed
 def get_wifi_strength():
     """Get Wi-Fi signal strength (percentage)"""
     try:
@@ -0,0 +1,114 @@
+import time
+import threading
+import functools
+from collections import deque
+from . import config
+
+# --- FRAME BUDGET WATCHDOG ---
+# Times every phase of a frame (input, update, draw, present) and the functions
+# decorated with @timed. A frame over FRAME_BUDGET is logged with its mode, its
+# slowest phase and its slowest named function (at most once per LOG_INTERVAL).
+# Frame times are kept per mode for rolling p50/p99.
+
+LOG_INTERVAL = 5.0 # Seconds between two slow-frame logs
+HISTORY = 300 # Frames kept per mode for the percentiles
+
+_frame = {
+    "active": False,
+    "thread": None,
+    "mode": None,
+    "start": 0.0,
+    "phase": None,
+    "phase_start": 0.0,
+    "phases": {},
+    "functions": {}
+}
+_history = {} # mode -> deque of frame times (seconds)
+_log = {"last": 0.0, "suppressed": 0}
+stats = {"frames": 0, "slow_frames": 0}
+
+def begin_frame(mode):
+    _frame["active"] = True
+    _frame["thread"] = threading.get_ident()
+    _frame["mode"] = mode
+    _frame["phases"] = {}
+    _frame["functions"] = {}
+    _frame["start"] = _frame["phase_start"] = time.perf_counter()
+    _frame["phase"] = None
+
+def enter(name):
+    """Start the `name` phase of the frame (ends the previous one)"""
+    now = time.perf_counter()
+    previous = _frame["phase"]
+    if previous:
+        phases = _frame["phases"]
+        phases[previous] = phases.get(previous, 0.0) + now - _frame["phase_start"]
+    _frame["phase"] = name
+    _frame["phase_start"] = now
+
+def timed(fn):
+    """Record the duration of fn when called during a frame on the frame's thread"""
+    name = fn.__qualname__
+    module = fn.__module__.rsplit(".", 1)[-1]
+    label = f"{module}.{name}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _frame["active"] or threading.get_ident() != _frame["thread"]:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            functions = _frame["functions"]
+            functions[label] = functions.get(label, 0.0) + time.perf_counter() - start
+    return wrapper
+
+def end_frame(mode=None):
+    """Close the frame: record its time and log it if it went over budget"""
+    if not _frame["active"]:
+        return
+    enter(None)
+    _frame["active"] = False
+    elapsed = time.perf_counter() - _frame["start"]
+    mode = mode or _frame["mode"]
+    stats["frames"] += 1
+    _history.setdefault(mode, deque(maxlen=HISTORY)).append(elapsed)
+
+    if elapsed <= config.FRAME_BUDGET:
+        return
+    stats["slow_frames"] += 1
+    now = time.monotonic()
+    if now - _log["last"] < LOG_INTERVAL:
+        _log["suppressed"] += 1
+        return
+
+    phases = _frame["phases"]
+    slow_phase = max(phases, key=phases.get) if phases else "?"
+    functions = _frame["functions"]
+    culprit = ""
+    if functions:
+        fn = max(functions, key=functions.get)
+        culprit = f", slowest {fn} {functions[fn] * 1000:.0f}ms"
+    suppressed = f" (+{_log['suppressed']} slow frames not logged)" if _log["suppressed"] else ""
+    print(f"🐢 Slow frame in {mode}: {elapsed * 1000:.0f}ms > {config.FRAME_BUDGET * 1000:.0f}ms, "
+          f"{slow_phase} {phases.get(slow_phase, 0) * 1000:.0f}ms{culprit}{suppressed}")
+    _log["last"] = now
+    _log["suppressed"] = 0
+
+def _percentile(sorted_times, p):
+    return sorted_times[min(len(sorted_times) - 1, int(p * len(sorted_times)))]
+
+def percentiles(mode):
+    """(p50, p99) frame time in seconds over the last HISTORY frames of a mode"""
+    times = sorted(_history.get(mode, ()))
+    if not times:
+        return None
+    return _percentile(times, 0.50), _percentile(times, 0.99)
+
+def report():
+    """Log p50/p99 per mode"""
+    print(f"⏱️ Frames: {stats['frames']}, over budget: {stats['slow_frames']}")
+    for mode in sorted(_history):
+        p50, p99 = percentiles(mode)
+        print(f"   {mode:<15} p50 {p50 * 1000:6.1f}ms  p99 {p99 * 1000:6.1f}ms  ({len(_history[mode])} frames)")
@@ -47,6 +47,8 @@ sudo systemctl daemon-reload
 sudo cp /home/pi/bmo/bmo.service /etc/systemd/system/bmo.service
 sudo cp /home/pi/bmo/bmo-mirror.service /etc/systemd/system/bmo-mirror.service
 sudo systemctl daemon-reload
+# The runtime writes the panel directly; the mirror is an HDMI debugging aid only
+sudo systemctl disable --now bmo-mirror.service 2>/dev/null || true
 sudo systemctl restart bmo.service
 echo "✅ Service restarted!"
 
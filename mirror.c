@@ -1,68 +1,131 @@
+// BMO debug mirror: copies the SPI panel (written by bmo_project) to the HDMI/GPU
+// framebuffer so the UI can be watched on a monitor.
+// Nothing is polled: the runtime (started with BMO_MIRROR=1) sends the damaged
+// row spans as little-endian uint16 (y0, y1) pairs to DAMAGE_SOCKET, and only
+// those rows are copied.
 #include <stdio.h>
 #include <stdlib.h>
+#include <stdint.h>
+#include <errno.h>
 #include <fcntl.h>
 #include <unistd.h>
 #include <sys/mman.h>
 #include <sys/ioctl.h>
+#include <sys/socket.h>
+#include <sys/stat.h>
+#include <sys/un.h>
 #include <linux/fb.h>
 #include <string.h>
 
-int main() {
-    // On cherche les deux framebuffers
-    int f0 = open("/dev/fb0", O_RDWR);
-    int f1 = open("/dev/fb1", O_RDWR);
-    
-    if (f0 < 0) { perror("FB0 missing"); return 1; }
-    
-    struct fb_var_screeninfo v0, v1;
-    ioctl(f0, FBIOGET_VSCREENINFO, &v0);
-    
-    int src_fd, dst_fd;
-    struct fb_var_screeninfo *src_v, *dst_v;
+#define DAMAGE_SOCKET "/run/bmo-damage.sock"
 
-    // Détection auto : celui qui a le nom "ili" ou "tft" est la destination
-    // Sinon on se base sur le fait que le GPU est souvent en 32bpp et l'écran en 16bpp
-    if (v0.bits_per_pixel == 16) {
-        printf("Detected SPI Screen on FB0, GPU on FB1 (or missing)\n");
-        dst_fd = f0; src_fd = f1;
-    } else {
-        printf("Detected GPU on FB0, SPI Screen on FB1\n");
-        src_fd = f0; dst_fd = f1;
-    }
+struct fb {
+    int fd;
+    struct fb_var_screeninfo var;
+    struct fb_fix_screeninfo fix;
+    uint8_t *mem;
+};
 
-    if (src_fd < 0) {
-        printf("Error: GPU framebuffer not found. Make sure hdmi_force_hotplug=1 is in config.txt\n");
-        return 1;
+static int open_fb(const char *path, int prot, struct fb *fb) {
+    fb->fd = open(path, prot == PROT_READ ? O_RDONLY : O_RDWR);
+    if (fb->fd < 0) { perror(path); return -1; }
+    if (ioctl(fb->fd, FBIOGET_VSCREENINFO, &fb->var) < 0 || ioctl(fb->fd, FBIOGET_FSCREENINFO, &fb->fix) < 0) {
+        perror("FBIOGET_SCREENINFO");
+        return -1;
     }
+    fb->mem = mmap(NULL, fb->fix.line_length * fb->var.yres, prot, MAP_SHARED, fb->fd, 0);
+    if (fb->mem == MAP_FAILED) { perror("mmap failed"); return -1; }
+    return 0;
+}
+
+static inline uint32_t get_px(const uint8_t *row, int x, int bpp) {
+    if (bpp == 16) return ((const uint16_t *)row)[x];
+    if (bpp == 32) return ((const uint32_t *)row)[x];
+    return row[x * 3] | (row[x * 3 + 1] << 8) | (row[x * 3 + 2] << 16);
+}
+
+static inline void put_px(uint8_t *row, int x, int bpp, uint32_t p) {
+    if (bpp == 16) ((uint16_t *)row)[x] = p;
+    else if (bpp == 32) ((uint32_t *)row)[x] = p;
+    else { row[x * 3] = p; row[x * 3 + 1] = p >> 8; row[x * 3 + 2] = p >> 16; }
+}
+
+// Move one channel between two bitfield layouts
+static inline uint32_t convert_channel(uint32_t p, const struct fb_bitfield *from, const struct fb_bitfield *to) {
+    if (!from->length || !to->length) return 0;
+    uint32_t v = (p >> from->offset) & ((1u << from->length) - 1);
+    if (from->length > to->length) v >>= from->length - to->length;
+    else v <<= to->length - from->length;
+    return v << to->offset;
+}
 
-    ioctl(src_fd, FBIOGET_VSCREENINFO, &v0);
-    ioctl(dst_fd, FBIOGET_VSCREENINFO, &v1);
+static void copy_rows(const struct fb *src, struct fb *dst, int y0, int y1) {
+    int w = src->var.xres < dst->var.xres ? src->var.xres : dst->var.xres;
+    int same = src->var.bits_per_pixel == dst->var.bits_per_pixel
+        && src->var.red.offset == dst->var.red.offset
+        && src->var.green.offset == dst->var.green.offset
+        && src->var.blue.offset == dst->var.blue.offset;
 
-    size_t s0 = v0.xres * v0.yres * (v0.bits_per_pixel / 8);
-    size_t s1 = 480 * 320 * 2; // Forcer taille SPI 3.5"
+    if (y1 > (int)src->var.yres) y1 = src->var.yres;
+    if (y1 > (int)dst->var.yres) y1 = dst->var.yres;
 
-    unsigned char *m0 = mmap(NULL, s0, PROT_READ, MAP_SHARED, src_fd, 0);
-    unsigned char *m1 = mmap(NULL, s1, PROT_WRITE, MAP_SHARED, dst_fd, 0);
+    for (int y = y0; y < y1; y++) {
+        const uint8_t *s = src->mem + y * src->fix.line_length;
+        uint8_t *d = dst->mem + y * dst->fix.line_length;
+        if (same) {
+            memcpy(d, s, w * src->var.bits_per_pixel / 8);
+            continue;
+        }
+        for (int x = 0; x < w; x++) {
+            uint32_t p = get_px(s, x, src->var.bits_per_pixel);
+            put_px(d, x, dst->var.bits_per_pixel,
+                   convert_channel(p, &src->var.red, &dst->var.red)
+                   | convert_channel(p, &src->var.green, &dst->var.green)
+                   | convert_channel(p, &src->var.blue, &dst->var.blue));
+        }
+    }
+}
+
+int main(int argc, char **argv) {
+    // Source is the SPI panel, destination the GPU/HDMI framebuffer
+    const char *panel_path = argc > 1 ? argv[1] : "/dev/fb1";
+    const char *hdmi_path = argc > 2 ? argv[2] : "/dev/fb0";
+    struct fb panel, hdmi;
 
-    if (m0 == MAP_FAILED || m1 == MAP_FAILED) {
-        perror("mmap failed");
+    if (open_fb(panel_path, PROT_READ, &panel) < 0) return 1;
+    if (open_fb(hdmi_path, PROT_READ | PROT_WRITE, &hdmi) < 0) {
+        printf("Error: HDMI framebuffer not found. Make sure hdmi_force_hotplug=1 is in config.txt\n");
         return 1;
     }
 
-    printf("Mirroring started: %dx%d (%dbpp) -> 480x320 (16bpp)\n", v0.xres, v0.yres, v0.bits_per_pixel);
+    int sock = socket(AF_UNIX, SOCK_DGRAM, 0);
+    struct sockaddr_un addr = { .sun_family = AF_UNIX };
+    strncpy(addr.sun_path, DAMAGE_SOCKET, sizeof(addr.sun_path) - 1);
+    unlink(DAMAGE_SOCKET);
+    if (sock < 0 || bind(sock, (struct sockaddr *)&addr, sizeof(addr)) < 0) {
+        perror("damage socket");
+        return 1;
+    }
+    chmod(DAMAGE_SOCKET, 0666);
+
+    printf("Mirroring %s (%dx%d, %dbpp) -> %s (%dx%d, %dbpp) on damage from %s\n",
+           panel_path, panel.var.xres, panel.var.yres, panel.var.bits_per_pixel,
+           hdmi_path, hdmi.var.xres, hdmi.var.yres, hdmi.var.bits_per_pixel, DAMAGE_SOCKET);
 
+    // Initial full copy, then only what the renderer reports
+    copy_rows(&panel, &hdmi, 0, panel.var.yres);
+
+    uint16_t spans[512];
     while (1) {
-        if (v0.bits_per_pixel == 32) {
-            unsigned int *src = (unsigned int *)m0;
-            unsigned short *dst = (unsigned short *)m1;
-            for (int i = 0; i < 480 * 320; i++) {
-                unsigned int p = src[i];
-                dst[i] = (((p >> 16) & 0xF8) << 8) | (((p >> 8) & 0xFC) << 3) | (p >> 3 & 0x1F);
-            }
-        } else {
-            memcpy(m1, m0, s1);
+        ssize_t n = recv(sock, spans, sizeof(spans), 0);
+        if (n < 0) {
+            if (errno == EINTR) continue;
+            perror("recv");
+            return 1;
+        }
+        for (int i = 0; i + 1 < n / 2; i += 2) {
+            copy_rows(&panel, &hdmi, spans[i], spans[i + 1]);
         }
-        usleep(16000); // ~60 FPS
     }
     return 0;
 }